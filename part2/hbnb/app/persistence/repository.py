@@ -28,6 +28,25 @@ class Repository(ABC):
     def get_by_attribute(self, attr_name, attr_value):
         pass
 
+    @abstractmethod
+    def add_many(self, objs):
+        pass
+
+    @abstractmethod
+    def get_many(self, obj_ids):
+        """Return (objects in input order, missing ids)"""
+        pass
+
+    @abstractmethod
+    def update_many(self, updates):
+        """Apply {obj_id: data}; return (updated objects in input order, missing ids)"""
+        pass
+
+    @abstractmethod
+    def delete_many(self, obj_ids):
+        """Delete the given ids; return how many objects were deleted"""
+        pass
+
 
 class InMemoryRepository(Repository):
     def __init__(self):
@@ -36,22 +55,45 @@ class InMemoryRepository(Repository):
     def add(self, obj):
         self._storage[obj.id] = obj
 
+    def add_many(self, objs):
+        for obj in objs:
+            self._storage[obj.id] = obj
+
     def get(self, obj_id):
         return self._storage.get(obj_id)
 
     def get_all(self):
         return list(self._storage.values())
 
+    def get_many(self, obj_ids):
+        obj_ids = list(obj_ids)
+        objects = [self._storage[obj_id] for obj_id in obj_ids if obj_id in self._storage]
+        missing = [obj_id for obj_id in dict.fromkeys(obj_ids) if obj_id not in self._storage]
+        return objects, missing
+
     def update(self, obj_id, data):
         obj = self.get(obj_id)
         if obj:
             obj.update(data)
             self._storage[obj_id] = obj
 
+    def update_many(self, updates):
+        objects, missing = self.get_many(updates)
+        for obj in objects:
+            obj.update(updates[obj.id])
+        return objects, missing
+
     def delete(self, obj_id):
         if obj_id in self._storage:
             del self._storage[obj_id]
 
+    def delete_many(self, obj_ids):
+        deleted = 0
+        for obj_id in dict.fromkeys(obj_ids):
+            if self._storage.pop(obj_id, None) is not None:
+                deleted += 1
+        return deleted
+
     def get_by_attribute(self, attr_name, attr_value):
         return next((obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value), None)
 
@@ -63,12 +105,24 @@ class SQLAlchemyRepository(Repository):
         db.session.add(obj)
         db.session.commit()
 
+    def add_many(self, objs):
+        db.session.add_all(objs)
+        db.session.commit()
+
     def get(self, obj_id):
         return self.model.query.get(obj_id)
 
     def get_all(self):
         return self.model.query.all()
 
+    def get_many(self, obj_ids):
+        obj_ids = list(obj_ids)
+        unique_ids = list(dict.fromkeys(obj_ids))
+        found = {obj.id: obj for obj in self.model.query.filter(self.model.id.in_(unique_ids))} if unique_ids else {}
+        objects = [found[obj_id] for obj_id in obj_ids if obj_id in found]
+        missing = [obj_id for obj_id in unique_ids if obj_id not in found]
+        return objects, missing
+
     def update(self, obj_id, data):
         obj = self.get(obj_id)
         if obj:
@@ -82,5 +136,20 @@ class SQLAlchemyRepository(Repository):
             db.session.delete(obj)
             db.session.commit()
 
+    def update_many(self, updates):
+        objects, missing = self.get_many(updates)
+        for obj in objects:
+            for key, value in updates[obj.id].items():
+                setattr(obj, key, value)
+        db.session.commit()
+        return objects, missing
+
+    def delete_many(self, obj_ids):
+        objects, _ = self.get_many(dict.fromkeys(obj_ids))
+        for obj in objects:
+            db.session.delete(obj)
+        db.session.commit()
+        return len(objects)
+
     def get_by_attribute(self, attr_name, attr_value):
         return self.model.query.filter(getattr(self.model, attr_name) == attr_value).first()
\ No newline at end of file
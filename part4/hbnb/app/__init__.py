@@ -1,11 +1,17 @@
+import os
+import click
 from flask import Flask, render_template
 from flask_restx import Api
 from flask_bcrypt import Bcrypt
-from flask_jwt_extended import JWTManager
 from flask_sqlalchemy import SQLAlchemy
+from app.engine import RoutingSession
 bcrypt = Bcrypt()
-jwt = JWTManager()
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+from app.hashing import PasswordHasher, HashingBusy
+hasher = PasswordHasher(bcrypt)
+from app.tokens import CachingJWTManager
+jwt = CachingJWTManager()
+from app.engine import apply_sqlite_pragmas, engine_options, sqlite_pragmas
 from app.api.v1.users import api as users_ns
 from app.api.v1.amenities import api as amenities_ns
 from app.api.v1.places import api as places_ns
@@ -14,7 +20,10 @@ from app.api.v1.auth import api as auth_ns
 from app.api.v1.admin import api as admin_ns
 import config
 
-def create_app(config_class=config.DevelopmentConfig):
+def create_app(config_class=None):
+    # Without an explicit class, APP_CONFIG picks one by name from config.config
+    if config_class is None:
+        config_class = config.config[os.getenv('APP_CONFIG', 'default')]
     app = Flask(__name__)
     authorizations = {
         'Bearer': {
@@ -31,9 +40,17 @@ def create_app(config_class=config.DevelopmentConfig):
 
     print('has been called')
 
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
     db.init_app(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            apply_sqlite_pragmas(engine, sqlite_pragmas(app.config))
     bcrypt.init_app(app)
+    hasher.init_app(app)
     jwt.init_app(app)   
+
+    from app.services import facade
+    facade.configure_place_cache(app.config['PLACE_CACHE_ENABLED'], app.config['PLACE_CACHE_SIZE'])
     
     api.add_namespace(users_ns, path='/api/v1/users')
     api.add_namespace(places_ns, path='/api/v1/places')
@@ -42,6 +59,27 @@ def create_app(config_class=config.DevelopmentConfig):
     api.add_namespace(admin_ns, path='/api/v1/admin')
     api.add_namespace(auth_ns, path='/api/v1/auth')
 
+    @app.cli.command('rebuild-ratings')
+    def rebuild_ratings():
+        """Recompute the review count and rating sum of every place"""
+        from app.services import facade
+        count = facade.rebuild_rating_aggregates()
+        print(f'Rebuilt rating aggregates for {count} places')
+
+    @app.cli.command('migrate-db')
+    def migrate_db():
+        """Apply the pending schema migrations (create_app also does on startup)"""
+        from app.persistence.migrations import upgrade
+        applied = upgrade(db.engine)
+        print(f'Applied migrations: {applied}' if applied else 'Schema is up to date')
+
+    @app.cli.command('calibrate-bcrypt')
+    @click.option('--target-ms', type=float, default=250.0, help='Hash time to aim for')
+    def calibrate_bcrypt(target_ms):
+        """Print the BCRYPT_LOG_ROUNDS whose hash takes about --target-ms here, to pin in every worker's environment"""
+        rounds = hasher.calibrate(target_ms, app.config['BCRYPT_MIN_ROUNDS'])
+        print(f'BCRYPT_LOG_ROUNDS={rounds}')
+
     @app.route('/login')
     def login():
         return render_template("login.html")
@@ -60,4 +98,6 @@ def create_app(config_class=config.DevelopmentConfig):
     
     with app.app_context():
         db.create_all()
+        from app.persistence.migrations import upgrade
+        upgrade(db.engine)
     return app
\ No newline at end of file
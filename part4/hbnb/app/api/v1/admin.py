@@ -1,52 +1,125 @@
 from flask_restx import Namespace, Resource
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
+from app.api.v1.principal import current_principal
 from app.services import facade
-from flask import request
+from app import HashingBusy, db, hasher
+from app.engine import pool_stats
+from flask import current_app, request
+import json
 
 api = Namespace('admin', description='Admin operations')
 
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+
+def parse_bulk_rows():
+    """Rows of a bulk import: a JSON array, or NDJSON with one object per line
+
+    An NDJSON line that is not valid JSON becomes None, which is reported
+    as an invalid row instead of failing the whole import.
+    """
+    body = request.get_data(as_text=True)
+    if request.mimetype in NDJSON_MIMETYPES:
+        rows = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                rows.append(None)
+        return rows
+    try:
+        rows = json.loads(body)
+    except ValueError:
+        raise ValueError('Body must be a JSON array or NDJSON')
+    if not isinstance(rows, list):
+        raise ValueError('Body must be a JSON array or NDJSON')
+    return rows
+
 @api.route('/users/')
 class AdminUserCreate(Resource):
     @jwt_required()
     def post(self):
-        current_user = get_jwt_identity()
-        if not current_user.get('is_admin'):
+        if not current_principal().is_admin:
             return {'error': 'Admin privileges required'}, 403
 
         user_data = request.json
-        email = user_data.get('email')
-
-        # Check if email is already in use
-        if facade.get_user_by_email(email):
-            return {'error': 'Email already registered'}, 400
 
-        new_user = facade.create_user(user_data)
-        hashed_password = new_user.hash_password(user_data['password'])
-        if hashed_password == False:
-            return {'error': 'Password not hashed'}, 500
+        # The unique email index rejects duplicates; no lookup beforehand
+        try:
+            new_user = facade.create_user(user_data)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        except HashingBusy as e:
+            return {'error': str(e)}, 503, {'Retry-After': '1'}
         return {'id': new_user.id, 'first_name': new_user.first_name, 'last_name': new_user.last_name, 'email': new_user.email}, 201
 
+@api.route('/users/bulk')
+class AdminUserBulkCreate(Resource):
+    @jwt_required()
+    def post(self):
+        """Register many users from a JSON array or NDJSON body and report on every row"""
+        if not current_principal().is_admin:
+            return {'error': 'Admin privileges required'}, 403
+        try:
+            rows = parse_bulk_rows()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        max_rows = current_app.config['BULK_IMPORT_MAX_ROWS']
+        if len(rows) > max_rows:
+            return {'error': f'At most {max_rows} rows per request'}, 413
+
+        results = facade.bulk_create_users(rows, current_app.config['BULK_IMPORT_BATCH_SIZE'],
+                                           current_app.config['BULK_HASH_WORKERS'] or None)
+        created = sum(1 for result in results if result['status'] == 'created')
+        return {'created': created, 'failed': len(results) - created, 'results': results}, 200
+
 @api.route('/users/<user_id>')
 class AdminUserModify(Resource):
     @jwt_required()
     def put(self, user_id):
-        current_user = get_jwt_identity()
-        if not current_user.get('is_admin'):
+        if not current_principal().is_admin:
             return {'error': 'Admin privileges required'}, 403
 
         user_data = request.json
-        email = user_data.get('email')
-
-        # Ensure email uniqueness
-        if email:
-            existing_user = facade.get_user_by_email(email)
-            if existing_user and existing_user.id != user_id:
-                return {'error': 'Email already in use'}, 400
 
-        # Logic to update user details
-        user = facade.update_user(user_id, user_data)
-        if user == 404:
+        # Logic to update user details; a taken email is rejected by the unique index
+        try:
+            user = facade.update_user(user_id, user_data)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        except HashingBusy as e:
+            return {'error': str(e)}, 503, {'Retry-After': '1'}
+        if user is None:
             return {'error': 'User not found'}, 404
-        if user == 400:
-            return {'error': 'Invalid data'}, 400
-        return {'id': user.id, 'first_name': user.first_name, 'last_name': user.last_name, 'email': user.email}, 200
\ No newline at end of file
+        return {'id': user.id, 'first_name': user.first_name, 'last_name': user.last_name, 'email': user.email}, 200
+
+@api.route('/cache/places')
+class AdminPlaceCacheStats(Resource):
+    @jwt_required()
+    def get(self):
+        """Size and hit/miss counters of the place detail cache"""
+        if not current_principal().is_admin:
+            return {'error': 'Admin privileges required'}, 403
+        return facade.place_cache_stats(), 200
+
+
+@api.route('/hashing')
+class AdminHashingStats(Resource):
+    @jwt_required()
+    def get(self):
+        """Queue depth and timings of the password hashing pool"""
+        if not current_principal().is_admin:
+            return {'error': 'Admin privileges required'}, 403
+        return hasher.stats(), 200
+
+
+@api.route('/db/pool')
+class AdminPoolStats(Resource):
+    @jwt_required()
+    def get(self):
+        """Checked-out, overflow and wait-time gauges of the database connection pool"""
+        if not current_principal().is_admin:
+            return {'error': 'Admin privileges required'}, 403
+        return pool_stats(db.engine), 200
@@ -1,7 +1,10 @@
 from flask_restx import Namespace, Resource, fields
 from app.services import facade
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
+from app.api.v1.principal import current_principal
 from flask import request
+from app.api.v1.streaming import wants_stream, batch_size, stream_json_array
+from app.api.v1.etags import conditional, resource_etag, collection_etag
 
 
 api = Namespace('amenities', description='Amenity operations')
@@ -11,6 +14,13 @@ amenity_model = api.model('Amenity', {
     'name': fields.String(required=True, description='Name of the amenity')
 })
 
+def amenity_to_dict(a):
+    return {
+        'id': a.id,
+        'name': a.name
+    }
+
+
 @api.route('/')
 class AmenityList(Resource):
     @api.expect(amenity_model)
@@ -20,9 +30,7 @@ class AmenityList(Resource):
     @jwt_required()
     def post(self):
         """Admin creates a new amenity"""
-        current_user = get_jwt_identity()
-
-        if not current_user.get("is_admin"):
+        if not current_principal().is_admin:
             return {"error": "Admin privileges required"}, 403
 
         amenity_data = api.payload
@@ -36,27 +44,32 @@ class AmenityList(Resource):
             return {'error': str(e)}, 400
 
     @api.response(200, 'List of amenities retrieved successfully')
+    @api.response(304, 'Amenities not modified since the ETag in If-None-Match')
+    @api.doc(params={'stream': 'Set to true to stream the amenities as a chunked JSON array'})
     def get(self):
         """Retrieve the list of all amenities"""
+        return conditional(collection_etag(facade.get_amenities_version()), self.render)
+
+    def render(self):
+        if wants_stream():
+            return stream_json_array(facade.iter_all_amenities(batch_size()), amenity_to_dict)
         amenities = facade.get_all_amenities()
-        return [
-            {
-                'id': a.id,
-                'name': a.name
-            }
-            for a in amenities
-        ], 200
+        return [amenity_to_dict(a) for a in amenities], 200
 
 @api.route('/<amenity_id>')
 class AmenityResource(Resource):
     @api.response(200, 'Amenity details retrieved successfully')
+    @api.response(304, 'Amenity not modified since the ETag in If-None-Match')
     @api.response(404, 'Amenity not found')
     def get(self, amenity_id):
         """Get amenity details by ID"""
-        # Placeholder for the logic to retrieve an amenity by ID
-        amenity = facade.get_amenity(amenity_id)
-        if not amenity:
+        updated_at = facade.get_amenity_version(amenity_id)
+        if updated_at is None:
             return {'error': 'Amenity not found'}, 404
+        return conditional(resource_etag(amenity_id, updated_at), lambda: self.render(amenity_id))
+
+    def render(self, amenity_id):
+        amenity = facade.get_amenity(amenity_id)
         return {
             'id': amenity.id,
             'name': amenity.name
@@ -69,9 +82,7 @@ class AmenityResource(Resource):
     @jwt_required()
     def put(self, amenity_id):
         """Admin updates amenity"""
-        current_user = get_jwt_identity()
-
-        if not current_user.get("is_admin"):
+        if not current_principal().is_admin:
             return {"error": "Admin privileges required"}, 403
 
         amenity_data = api.payload
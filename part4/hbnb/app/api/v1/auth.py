@@ -1,7 +1,10 @@
 from flask_restx import Namespace, Resource, fields
-from flask_jwt_extended import create_access_token
+from flask_jwt_extended import create_access_token, create_refresh_token
 from app.services import facade
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from app import HashingBusy, hasher
+from flask import current_app
+from flask_jwt_extended import jwt_required
+from app.api.v1.principal import current_principal
 
 
 api = Namespace('auth', description='Authentication operations')
@@ -23,13 +26,38 @@ class Login(Resource):
         user = facade.get_user_by_email(credentials['email'])
         
         # Step 2: Check if the user exists and the password is correct
-        if not user or not user.verify_password(credentials['password']):
-            return {'error': 'Invalid credentials'}, 401
+        try:
+            if not user or not user.verify_password(credentials['password']):
+                return {'error': 'Invalid credentials'}, 401
+        except HashingBusy as e:
+            return {'error': str(e)}, 503, {'Retry-After': '1'}
+
+        # Upgrade a hash made at a lower bcrypt cost without delaying the answer
+        if hasher.needs_rehash(user.password):
+            user_id, old_hash = user.id, user.password
+            hasher.rehash_later(current_app._get_current_object(), credentials['password'],
+                                lambda new_hash: facade.replace_password_hash(user_id, old_hash, new_hash))
 
         # Step 3: Create a JWT token with the user's id and is_admin flag
-        access_token = create_access_token(identity={'id': str(user.id), 'is_admin': user.is_admin})
+        identity = {'id': str(user.id), 'is_admin': user.is_admin}
+        access_token = create_access_token(identity=identity)
+        refresh_token = create_refresh_token(identity=identity)
         
-        # Step 4: Return the JWT token to the client
+        # Step 4: Return the JWT tokens to the client
+        return {'access_token': access_token, 'refresh_token': refresh_token}, 200
+
+@api.route('/refresh')
+class Refresh(Resource):
+    @api.response(200, 'New access token issued')
+    @api.response(401, 'User no longer exists')
+    @jwt_required(refresh=True)
+    def post(self):
+        """Exchange a refresh token for a new access token, without checking the password again"""
+        # A plain row read, no bcrypt: picks up is_admin changes and deleted users
+        user = current_principal().user
+        if not user:
+            return {'error': 'User not found'}, 401
+        access_token = create_access_token(identity={'id': str(user.id), 'is_admin': user.is_admin})
         return {'access_token': access_token}, 200
     
 @api.route('/protected')
@@ -37,6 +65,6 @@ class ProtectedResource(Resource):
     @jwt_required()
     def get(self):
         """A protected endpoint that requires a valid JWT token"""
-        current_user = get_jwt_identity()  # Retrieve the user's identity from the token
-        return {'message': f'Hello, user {current_user["id"]}'}, 200
+        principal = current_principal()  # The caller's identity, taken from the token
+        return {'message': f'Hello, user {principal.id}'}, 200
     
\ No newline at end of file
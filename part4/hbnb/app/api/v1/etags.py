@@ -0,0 +1,39 @@
+import hashlib
+from flask import Response, request
+from werkzeug.http import quote_etag
+
+
+def make_etag(*parts):
+    return hashlib.blake2b('|'.join(str(part) for part in parts).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def resource_etag(obj_id, updated_at):
+    """Strong ETag of one object, derived from its id and updated_at"""
+    return make_etag(obj_id, updated_at.isoformat())
+
+
+def collection_etag(version):
+    """Strong ETag of a collection from its (max updated_at, count) version"""
+    latest, count = version
+    return make_etag(latest.isoformat() if latest else '', count)
+
+
+def conditional(etag, render):
+    """Answer 304 when If-None-Match names `etag`, otherwise call `render()` and tag its 200 response
+
+    `render` returns what a Resource method would: a Response or a
+    (body, status[, headers]) tuple. It is not called on a match, so a
+    304 costs only the query that produced the ETag.
+    """
+    if request.if_none_match.contains_weak(etag):
+        return Response(status=304, headers={'ETag': quote_etag(etag)})
+    result = render()
+    if isinstance(result, Response):
+        if result.status_code == 200:
+            result.set_etag(etag)
+        return result
+    body, status, *rest = result
+    headers = dict(rest[0]) if rest else {}
+    if status == 200:
+        headers['ETag'] = quote_etag(etag)
+    return body, status, headers
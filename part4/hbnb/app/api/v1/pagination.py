@@ -0,0 +1,20 @@
+from urllib.parse import urlencode
+from flask import request
+
+DEFAULT_PAGE_LIMIT = 20
+MAX_PAGE_LIMIT = 100
+
+
+def page_limit():
+    """The ?limit= of a list request; ValueError when it is outside 1..MAX_PAGE_LIMIT"""
+    limit = request.args.get('limit', DEFAULT_PAGE_LIMIT, type=int)
+    if not 1 <= limit <= MAX_PAGE_LIMIT:
+        raise ValueError(f'limit must be between 1 and {MAX_PAGE_LIMIT}')
+    return limit
+
+
+def next_link(**updates):
+    """Link header value pointing at the current URL with `updates` applied to its query string"""
+    args = request.args.to_dict(flat=False)
+    args.update({name: [value] for name, value in updates.items()})
+    return f'<{request.base_url}?{urlencode(args, doseq=True)}>; rel="next"'
@@ -1,7 +1,12 @@
 from flask_restx import Namespace, Resource, fields
 from app.services import facade
 import uuid
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import request
+from flask_jwt_extended import jwt_required
+from app.api.v1.principal import current_principal
+from app.api.v1.streaming import wants_stream, batch_size, stream_json_array
+from app.api.v1.etags import conditional, resource_etag, collection_etag
+from app.api.v1.pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT, page_limit, next_link
 
 api = Namespace('places', description='Place operations')
 
@@ -36,6 +41,100 @@ place_model = api.model('Place', {
 })
 
 
+def place_to_dict(p):
+    """Serialize a place with its owner, amenities and reviews"""
+    return {
+        "Place id": p.id,
+        "title": p.title,
+        "description": p.description,
+        "price": p.price,
+        "latitude": p.latitude,
+        "longitude": p.longitude,
+        "review_count": p.review_count,
+        "average_rating": p.average_rating,
+        "owner": {
+            "id": p.owner.id,
+            "first_name": p.owner.first_name,
+            "last_name": p.owner.last_name,
+            "email": p.owner.email
+        },
+        "amenities": [
+            {
+                "id": a.id,
+                "name": a.name
+            } for a in p.amenities
+        ],
+        "reviews": [
+            {
+                "id": r.id,
+                "text": r.text,
+                "rating": r.rating,
+                "user_id": r.user.id
+            } for r in p.reviews
+        ]
+    }
+
+LIST_PARAMS = {
+    'limit': f'Page size (1-{MAX_PAGE_LIMIT}, default {DEFAULT_PAGE_LIMIT})',
+    'cursor': 'Opaque cursor taken from the Link header of the previous page',
+    'stream': 'Set to true to stream every place as one chunked JSON array',
+    'min_price': 'Only places costing at least this much per night',
+    'max_price': 'Only places costing at most this much per night',
+    'min_rating': 'Only places whose average review rating is at least this',
+    'amenity': 'Only places offering this amenity ID (repeat for several)'
+}
+
+
+def parse_bbox(value):
+    """Parse a west,south,east,north bounding box; west > east crosses the antimeridian"""
+    if not value:
+        raise ValueError("bbox is required")
+    try:
+        west, south, east, north = (float(part) for part in value.split(','))
+    except ValueError:
+        raise ValueError("bbox must be four numbers: west,south,east,north")
+    if not (-90.0 <= south <= north <= 90.0):
+        raise ValueError("bbox latitudes must satisfy -90 <= south <= north <= 90")
+    if not (-180.0 <= west <= 180.0 and -180.0 <= east <= 180.0):
+        raise ValueError("bbox longitudes must be between -180 and 180")
+    return west, south, east, north
+
+
+def list_places(filters):
+    """Answer a places listing, or 304 when the filtered set has not changed since the client's copy"""
+    return conditional(collection_etag(facade.get_places_version(filters)), lambda: render_places(filters))
+
+
+def render_places(filters):
+    """Render a places listing: streamed when asked to, otherwise one keyset page"""
+    if wants_stream():
+        return stream_json_array(facade.iter_all_places(batch_size(), filters), place_to_dict)
+    try:
+        limit = page_limit()
+        places, next_cursor = facade.get_places_page(limit, request.args.get('cursor'), filters)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    headers = {}
+    if next_cursor:
+        headers['Link'] = next_link(limit=limit, cursor=next_cursor)
+    return [place_to_dict(p) for p in places], 200, headers
+
+
+def place_filters():
+    """Read the optional filters of the places list from the query string"""
+    filters = {}
+    for name in ('min_price', 'max_price', 'min_rating'):
+        value = request.args.get(name)
+        if value is not None:
+            try:
+                filters[name] = float(value)
+            except ValueError:
+                raise ValueError(f"{name} must be a number")
+    amenity_ids = request.args.getlist('amenity')
+    if amenity_ids:
+        filters['amenity_ids'] = amenity_ids
+    return filters
+
 
 @api.route('/')
 class PlaceList(Resource):
@@ -45,9 +144,8 @@ class PlaceList(Resource):
     @jwt_required()
     def post(self):
         """ Register a new place """
-        current_user = get_jwt_identity()
         place_data = api.payload
-        place_data['owner_id'] = current_user['id']
+        place_data['owner_id'] = current_principal().id
         try:
             place_new = facade.create_place(place_data)
 
@@ -65,79 +163,48 @@ class PlaceList(Resource):
             return {"message": str(e)}, 400
 
     @api.response(200, 'List of places retrieved successfully')
+    @api.response(304, 'Places not modified since the ETag in If-None-Match')
+    @api.response(400, 'Invalid limit or cursor')
+    @api.doc(params=LIST_PARAMS)
     def get(self):
-        """Retrieve a list of all places"""
-        places = facade.get_all_places()
-        return [
-            {
-                "Place id": p.id,
-                "title": p.title,
-                "description": p.description,
-                "price": p.price,
-                "latitude": p.latitude,
-                "longitude": p.longitude,
-                "owner": {
-                    "id": p.owner.id,
-                    "first_name": p.owner.first_name,
-                    "last_name": p.owner.last_name,
-                    "email": p.owner.email
-                },
-                "amenities": [
-                    {
-                        "id": a.id,
-                        "name": a.name
-                    } for a in p.amenities
-                ],
-                "reviews": [
-                    {
-                        "id": r.id,
-                        "text": r.text,
-                        "rating": r.rating,
-                        "user_id": r.user.id
-                    } for r in p.reviews
-                ]
-                
-            }
-            for p in places
-        ], 200
+        """Retrieve a page of places, oldest first; the next page is linked in the Link header"""
+        try:
+            filters = place_filters()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return list_places(filters)
+
+@api.route('/search')
+class PlaceSearch(Resource):
+    @api.response(200, 'Places inside the bounding box retrieved successfully')
+    @api.response(400, 'Missing or invalid bounding box')
+    @api.doc(params=dict(LIST_PARAMS, bbox='Bounding box as west,south,east,north in degrees (required)'))
+    def get(self):
+        """Retrieve the places inside a map viewport, paged like the places list"""
+        try:
+            filters = place_filters()
+            filters['bbox'] = parse_bbox(request.args.get('bbox'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return list_places(filters)
 
 @api.route('/<place_id>')
 class PlaceResource(Resource):
     @api.response(200, 'Place details retrieved successfully')
+    @api.response(304, 'Place not modified since the ETag in If-None-Match')
     @api.response(404, 'Place not found')
     def get(self, place_id):
         """Get place details by ID"""
-        place = facade.get_place(place_id)
-        if not place:
+        updated_at = facade.get_place_version(place_id)
+        if updated_at is None:
             return {'message': 'Place not found'}, 404
-        return {
-                "Place id": place.id,
-                "title": place.title,
-                "description": place.description,
-                "price": place.price,
-                "latitude": place.latitude,
-                "longitude": place.longitude,
-                        "owner": {
-                            "id": place.owner.id,
-                            "first_name": place.owner.first_name,
-                            "last_name": place.owner.last_name,
-                            "email": place.owner.email
-                        },
-                        "amenities": [
-                            {
-                                "id": a.id,
-                                "name": a.name
-                            } for a in place.amenities
-                        ],
-                        "reviews": [
-                            {
-                                "id": r.id,
-                                "text": r.text,
-                                "rating": r.rating,
-                                "user_id": r.user.id
-                            } for r in place.reviews
-                        ]   
-                }, 200
+
+        def render():
+            snapshot = facade.get_place_snapshot(place_id, updated_at, place_to_dict)
+            if snapshot is None:
+                return {'message': 'Place not found'}, 404
+            return snapshot, 200
+        return conditional(resource_etag(place_id, updated_at), render)
                 
     @api.expect(place_model)
     @api.response(200, 'Place updated successfully')
@@ -146,9 +213,7 @@ class PlaceResource(Resource):
     @jwt_required()
     def put(self, place_id):
         """Update a place's information"""
-        current_user = get_jwt_identity()
-        user_id = current_user.get("id")
-        is_admin = current_user.get("is_admin", False)
+        principal = current_principal()
 
         # تحقق من وجود المكان أولاً
         place = facade.get_place(place_id)
@@ -156,7 +221,7 @@ class PlaceResource(Resource):
             return {'message': 'Place not found'}, 404
 
         # تحقق الملكية أو الصلاحية
-        if not is_admin and place.owner.id != user_id:
+        if not principal.may_act_for(place.owner_id):
             return {"error": "Unauthorized"}, 403
 
         # نفذ التحديث
@@ -189,16 +254,36 @@ class PlaceResource(Resource):
 @api.route('/<place_id>/reviews')
 class PlaceReviewList(Resource):
     @api.response(200, 'List of reviews for the place retrieved successfully')
+    @api.response(304, 'Reviews not modified since the ETag in If-None-Match')
+    @api.response(400, 'Invalid limit, offset or sort')
     @api.response(404, 'Place not found')
+    @api.doc(params={'limit': f'Page size (1-{MAX_PAGE_LIMIT}, default {DEFAULT_PAGE_LIMIT})',
+                     'offset': 'Number of reviews to skip (default 0)',
+                     'sort': 'created_at, -created_at, rating or -rating (default created_at)'})
     def get(self, place_id):
-        """Get all reviews for a specific place"""
-        place = facade.get_reviews_by_place(place_id)
-        if not place:
-            return {'error': 'Place not found'}, 404
-        reviews = facade.get_reviews_by_place(place_id)
+        """Get a page of reviews for a specific place; the next page is linked in the Link header"""
+        etag = collection_etag(facade.get_reviews_version(place_id))
+        return conditional(etag, lambda: self.render(place_id))
+
+    def render(self, place_id):
+        offset = request.args.get('offset', 0, type=int)
+        sort = request.args.get('sort', 'created_at')
+        try:
+            limit = page_limit()
+            if offset < 0:
+                raise ValueError('offset must not be negative')
+            reviews = facade.get_reviews_by_place(place_id, limit + 1, offset, sort)
+        except ValueError as e:
+            if str(e) == "Place not found":
+                return {'error': 'Place not found'}, 404
+            return {'error': str(e)}, 400
+        headers = {}
+        if len(reviews) > limit:
+            reviews = reviews[:limit]
+            headers['Link'] = next_link(limit=limit, offset=offset + limit)
         return [{'id': review.id, 'text': review.text,
                 'rating': review.rating,
-                'user_id': review.user.id,
-                'place_id': review.place.id,
-                } for review in reviews], 200
+                'user_id': review.user_id,
+                'place_id': review.place_id,
+                } for review in reviews], 200, headers
     
\ No newline at end of file
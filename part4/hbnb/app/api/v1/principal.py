@@ -0,0 +1,40 @@
+from flask import request
+from flask_jwt_extended import get_jwt_identity
+from app.services import facade
+
+
+class Principal:
+    """The caller of the current request: its token identity and, on demand, its User row"""
+
+    def __init__(self, identity):
+        self.id = identity['id']
+        self.is_admin = identity.get('is_admin', False)
+        self._user = None
+        self._user_loaded = False
+
+    @property
+    def user(self):
+        """The caller's User row, loaded at most once per request (None if it was deleted)"""
+        if not self._user_loaded:
+            self._user = facade.get_user_by_id(self.id)
+            self._user_loaded = True
+        return self._user
+
+    def owns(self, user_id):
+        return self.id == user_id
+
+    def may_act_for(self, user_id):
+        """True for admins and for the user themself"""
+        return self.is_admin or self.owns(user_id)
+
+
+def current_principal():
+    """Principal of the current request, built once from the verified JWT identity
+
+    Kept in the WSGI environ rather than on `g`: `g` lives as long as the
+    app context, which outlasts a single request when one is already pushed.
+    """
+    principal = request.environ.get('hbnb.principal')
+    if principal is None:
+        principal = request.environ['hbnb.principal'] = Principal(get_jwt_identity())
+    return principal
@@ -1,6 +1,9 @@
 from flask_restx import Namespace, Resource, fields
 from app.services import facade
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
+from app.api.v1.principal import current_principal
+from app.api.v1.streaming import wants_stream, batch_size, stream_json_array
+from app.api.v1.etags import conditional, resource_etag, collection_etag
 
 api = Namespace('reviews', description='Review operations')
 
@@ -12,6 +15,13 @@ review_model = api.model('Review', {
 })
 
 
+def review_to_dict(r):
+    return {
+        "id": r.id,
+        "text": r.text,
+        "rating": r.rating
+    }
+
 
 @api.route('/')
 class ReviewList(Resource):
@@ -21,9 +31,8 @@ class ReviewList(Resource):
     @jwt_required()
     def post(self):
         """Register a new review"""
-        current_user = get_jwt_identity()
         review_data = api.payload
-        review_data['user_id'] = current_user['id']
+        review_data['user_id'] = current_principal().id
         review_data['place_id'] = review_data.get('place_id')
         try:
             review_new = facade.create_review(review_data)
@@ -37,29 +46,33 @@ class ReviewList(Resource):
             return {"error": str(e)}, 400
 
     @api.response(200, 'List of reviews retrieved successfully')
+    @api.response(304, 'Reviews not modified since the ETag in If-None-Match')
+    @api.doc(params={'stream': 'Set to true to stream the reviews as a chunked JSON array'})
     def get(self):
         """Retrieve a list of all reviews"""
-        # Placeholder for logic to return a list of all reviews
+        return conditional(collection_etag(facade.get_reviews_version()), self.render)
+
+    def render(self):
+        if wants_stream():
+            return stream_json_array(facade.iter_all_reviews(batch_size()), review_to_dict)
         review = facade.get_all_reviews()
-        return [
-            {
-                "id": r.id,
-                "text": r.text,
-                "rating": r.rating
-            }
-            for r in review
-        ], 200
+        return [review_to_dict(r) for r in review], 200
 
 
 @api.route('/<review_id>')
 class ReviewResource(Resource):
     @api.response(200, 'Review details retrieved successfully')
+    @api.response(304, 'Review not modified since the ETag in If-None-Match')
     @api.response(404, 'Review not found')
     def get(self, review_id):
         """Get review details by ID"""
-        review = facade.get_review(review_id)
-        if not review:
+        updated_at = facade.get_review_version(review_id)
+        if updated_at is None:
             return {'message': 'Review not found'}, 404
+        return conditional(resource_etag(review_id, updated_at), lambda: self.render(review_id))
+
+    def render(self, review_id):
+        review = facade.get_review(review_id)
         return {
             "id": review.id,
             "text": review.text,
@@ -74,15 +87,11 @@ class ReviewResource(Resource):
     @jwt_required()
     def put(self, review_id):
         """Update a review's information"""
-        current_user = get_jwt_identity()
-        user_id = current_user.get("id")
-        is_admin = current_user.get("is_admin", False)
-
         review = facade.get_review(review_id)
         if not review:
             return {'message': 'Review not found'}, 404
 
-        if not is_admin and review.user.id != user_id:
+        if not current_principal().may_act_for(review.user_id):
             return {'error': 'Unauthorized'}, 403
 
         review_data = api.payload
@@ -101,15 +110,11 @@ class ReviewResource(Resource):
     @jwt_required()
     def delete(self, review_id):
         """Delete a review by ID"""
-        current_user = get_jwt_identity()
-        user_id = current_user.get("id")
-        is_admin = current_user.get("is_admin", False)
-
         review = facade.get_review(review_id)
         if not review:
             return {'message': 'Review not found'}, 404
 
-        if not is_admin and review.user.id != user_id:
+        if not current_principal().may_act_for(review.user_id):
             return {'error': 'Unauthorized'}, 403
 
         facade.delete_review(review_id)
@@ -0,0 +1,29 @@
+import json
+from flask import Response, current_app, request, stream_with_context
+
+
+def wants_stream():
+    """True when the client asked for the streaming mode with ?stream=true"""
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def batch_size():
+    return current_app.config.get('STREAM_BATCH_SIZE', 500)
+
+
+def stream_json_array(items, serialize):
+    """Send `items` as a chunked JSON array, serializing one element at a time
+
+    `items` should be a lazy iterator (e.g. a yield_per query) so the
+    opening bracket goes out before the first row is fetched and only
+    one batch of rows is held in memory at once.
+    """
+    def generate():
+        yield '['
+        for index, item in enumerate(items):
+            if index:
+                yield ','
+            yield json.dumps(serialize(item))
+        yield ']'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
@@ -1,6 +1,12 @@
 from flask_restx import Namespace, Resource, fields
 from app.services import facade
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models.user import User
+from app import HashingBusy
+from flask_jwt_extended import jwt_required
+from app.api.v1.principal import current_principal
+from app.api.v1.streaming import wants_stream, batch_size, stream_json_array
+from app.api.v1.pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT, page_limit, next_link
+from flask import request
 
 api = Namespace('users', description='User operations')
 
@@ -12,6 +18,9 @@ user_model = api.model('User', {
     'password': fields.String(required=True, description='Password of the user')
 })
 
+def user_to_dict(user):
+    return {'id': user.id, 'first_name': user.first_name, 'last_name': user.last_name, 'email': user.email}
+
 @api.route('/')
 class UserList(Resource):
     @api.expect(user_model, validate=True)
@@ -22,27 +31,35 @@ class UserList(Resource):
 
         user_data = api.payload
 
-        # Simulate email uniqueness check (to be replaced by real validation with persistence)
-        existing_user = facade.get_user_by_email(user_data['email'])
-        if existing_user:
-            return {'error': 'Email already registered'}, 400
-
-        new_user = facade.create_user(user_data)
-        if new_user.password == 'admin':
-            new_user.is_admin = True
-        hashed_password = new_user.hash_password(user_data['password'])
-        if hashed_password == False:
-            return {'error': 'Password not hashed'}, 500
+        # The unique email index rejects duplicates; no lookup beforehand
+        try:
+            new_user = facade.create_user(user_data)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        except HashingBusy as e:
+            return {'error': str(e)}, 503, {'Retry-After': '1'}
         return {'id': new_user.id, 'first_name': new_user.first_name, 'last_name': new_user.last_name, 'email': new_user.email}, 201
 
     @api.response(200, 'Users list retrieved successfully')
+    @api.response(400, 'Invalid limit or cursor')
     @api.response(404, 'User not found')
+    @api.doc(params={'limit': f'Page size (1-{MAX_PAGE_LIMIT}, default {DEFAULT_PAGE_LIMIT})',
+                     'cursor': 'Opaque cursor taken from the Link header of the previous page',
+                     'stream': 'Set to true to stream the users as a chunked JSON array'})
     def get(self):
-        """Get user list"""
-        users = facade.get_user_list()
-        if not users:
+        """Get a page of users, oldest first; the next page is linked in the Link header"""
+        if wants_stream():
+            return stream_json_array(facade.iter_all_users(batch_size()), user_to_dict)
+        cursor = request.args.get('cursor')
+        try:
+            limit = page_limit()
+            users, next_cursor = facade.get_users_page(limit, cursor)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        if not users and not cursor:
             return {'error': 'User not found'}, 404
-        return [{'id': user.id, 'first_name': user.first_name, 'last_name': user.last_name, 'email': user.email} for user in users], 200
+        headers = {'Link': next_link(limit=limit, cursor=next_cursor)} if next_cursor else {}
+        return [user_to_dict(user) for user in users], 200, headers
 
 @api.route('/<user_id>')
 class UserResource(Resource):
@@ -50,7 +67,7 @@ class UserResource(Resource):
     @api.response(404, 'User not found')
     def get(self, user_id):
         """Get user details by ID"""
-        user = facade.get_user(user_id)
+        user = facade.get_user_by_id(user_id)
         if not user:
             return {'error': 'User not found'}, 404
         return {'id': user.id, 'first_name': user.first_name, 'last_name': user.last_name, 'email': user.email, 'is_admin': user.is_admin}, 200
@@ -62,17 +79,21 @@ class UserResource(Resource):
     @jwt_required()
     def put(self, user_id):
         """Update user details"""
-        current_user = get_jwt_identity()
+        principal = current_principal()
         user_data = api.payload
-        initial_user = facade.get_user(user_id)
-        if not current_user.get('is_admin'):
-            if user_data['email'] != initial_user.email or initial_user.verify_password(user_data['password']):
-                return {'error': 'You cannot modify email or password'}
-        if not current_user.get('is_admin') and user_id != current_user['id']:
+        if not principal.may_act_for(user_id):
             return {'error': 'Unauthorized action'}, 403
-        user = facade.update_user(user_id, user_data)
-        if user == 404:
+        try:
+            if not principal.is_admin:
+                # Users editing themselves reuse the row the principal already loaded
+                initial_user = principal.user if principal.owns(user_id) else facade.get_user_by_id(user_id)
+                if User.normalize_email(user_data['email']) != initial_user.email or initial_user.verify_password(user_data['password']):
+                    return {'error': 'You cannot modify email or password'}
+            user = facade.update_user(user_id, user_data)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        except HashingBusy as e:
+            return {'error': str(e)}, 503, {'Retry-After': '1'}
+        if user is None:
             return {'error': 'User not found'}, 404
-        if user == 400:
-            return {'error': 'Invalid data'}, 400
         return {'id': user.id, 'first_name': user.first_name, 'last_name': user.last_name, 'email': user.email}, 200
\ No newline at end of file
@@ -0,0 +1,154 @@
+import random
+import threading
+import time
+from flask import current_app, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+
+
+class MonitoredQueuePool(QueuePool):
+    """QueuePool that also records how long checkouts wait for a connection
+
+    The wait covers the whole checkout: queueing for a free slot, opening
+    an overflow connection and the pre-ping when it is enabled. stats() combines the pool's own gauges with
+    those counters, for /api/v1/admin/db/pool and monitoring scrapes.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def connect(self):
+        # Timed here rather than in _do_get, which can call itself again on a race
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeout:
+            with self._stats_lock:
+                self._timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self._checkouts += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+
+    def stats(self):
+        with self._stats_lock:
+            checkouts = self._checkouts
+            return {
+                'size': self.size(),
+                'checked_out': self.checkedout(),
+                'checked_in': self.checkedin(),
+                'overflow': self.overflow(),
+                'checkouts': checkouts,
+                'timeouts': self._timeouts,
+                'avg_wait_ms': round(self._wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+                'max_wait_ms': round(self._wait_max * 1000, 3),
+            }
+
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingSession(Session):
+    """Session that sends reads inside read_replica() to one of the READ_REPLICAS binds
+
+    Only GET/HEAD/OPTIONS requests (or code outside a request) use the
+    replicas, so the checks a PUT or DELETE makes before writing see the
+    primary. Everything else goes to the primary: flushes, INSERT/UPDATE/DELETE
+    statements, reads inside a unit of work, and every read after this
+    session has written (read-your-writes for the rest of the request,
+    since db.session is replaced per request). A session sticks to the
+    replica it picked first, so one request never mixes two of them.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or isinstance(clause, UpdateBase):
+                self.info['wrote'] = True
+            elif self.info.get('read_replica') and not self.info.get('wrote') \
+                    and not self.info.get('unit_of_work') \
+                    and (not has_request_context() or request.method in READ_METHODS):
+                replica = self._replica_engine()
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica_engine(self):
+        replicas = current_app.config.get('READ_REPLICAS') or ()
+        if not replicas:
+            return None
+        if self.info.get('replica') not in replicas:
+            self.info['replica'] = random.choice(replicas)
+        return self._db.engines[self.info['replica']]
+
+
+def is_memory_sqlite(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and (
+        url.database in (None, '', ':memory:') or url.query.get('mode') == 'memory')
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS with the monitored pool filled in where a QueuePool would be used
+
+    In-memory SQLite keeps the single shared connection Flask-SQLAlchemy
+    gives it, and an explicit poolclass is left alone.
+    """
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    uri = config.get('SQLALCHEMY_DATABASE_URI')
+    if uri and 'poolclass' not in options and not is_memory_sqlite(uri):
+        options['poolclass'] = MonitoredQueuePool
+    return options
+
+
+def pool_stats(engine):
+    """Gauges and wait counters of the engine's pool; just the pool class when it is not monitored"""
+    pool = engine.pool
+    if isinstance(pool, MonitoredQueuePool):
+        return dict(pool.stats(), pool=type(pool).__name__)
+    return {'pool': type(pool).__name__}
+
+
+def sqlite_pragmas(config):
+    """PRAGMA name -> value for new SQLite connections, from the SQLITE_* settings; empty when tuning is off"""
+    if not config.get('SQLITE_TUNING', False):
+        return {}
+    pragmas = {
+        'journal_mode': config.get('SQLITE_JOURNAL_MODE'),
+        'synchronous': config.get('SQLITE_SYNCHRONOUS'),
+        'cache_size': config.get('SQLITE_CACHE_SIZE'),
+        'mmap_size': config.get('SQLITE_MMAP_SIZE'),
+        'temp_store': config.get('SQLITE_TEMP_STORE'),
+        'busy_timeout': config.get('SQLITE_BUSY_TIMEOUT'),
+    }
+    return {name: value for name, value in pragmas.items() if value is not None}
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """Run `pragmas` on every connection the engine opens; a no-op on other backends
+
+    PRAGMAs are per connection (journal_mode=WAL also sticks to the file),
+    so they go in a connect listener rather than a one-off statement.
+    """
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
@@ -0,0 +1,191 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+
+def hash_rounds(pw_hash):
+    """Cost factor of a bcrypt hash such as $2b$12$...; None when it cannot be read"""
+    try:
+        return int(pw_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class HashingBusy(RuntimeError):
+    """Raised when the password hashing pool is saturated or too slow to answer"""
+
+
+class PasswordHasher:
+    """Runs bcrypt on a small bounded thread pool instead of on the request threads
+
+    bcrypt releases the GIL while it works, so the pool size caps how many
+    cores password hashing can take at once, leaving the rest to the other
+    endpoints. At most HASH_WORKERS + HASH_QUEUE_LIMIT calls may be waiting
+    or running; further calls are refused with HashingBusy straight away
+    rather than piling up behind a login storm.
+    """
+
+    def __init__(self, bcrypt, app=None):
+        self.bcrypt = bcrypt
+        self.timeout = None
+        self.workers = 0
+        self.rounds = 12
+        self._executor = None
+        self._limit = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._reset_metrics()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        workers = app.config.get('HASH_WORKERS') or max(1, (os.cpu_count() or 2) // 2)
+        queue_limit = app.config.get('HASH_QUEUE_LIMIT', 32)
+        with self._lock:
+            previous = self._executor
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+            self._limit = workers + queue_limit
+            self.timeout = app.config.get('HASH_TIMEOUT', 10)
+            self.workers = workers
+            self.rounds = app.config.get('BCRYPT_LOG_ROUNDS', 12)
+            self._reset_metrics()
+        if previous is not None:
+            previous.shutdown(wait=False)
+
+    def _reset_metrics(self):
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.rehashed = 0
+        self.bulk_hashed = 0
+        self.wait_seconds = 0.0
+        self.hash_seconds = 0.0
+
+    def hash(self, password):
+        return self.run(lambda: self.bcrypt.generate_password_hash(password).decode('utf-8'))
+
+    def verify(self, pw_hash, password):
+        return self.run(lambda: self.bcrypt.check_password_hash(pw_hash, password))
+
+    def hash_many(self, passwords, workers=None):
+        """Hash a batch of passwords across `workers` threads (default: every core)
+
+        Meant for admin batch jobs: it runs on its own short-lived pool, so a
+        bulk import neither waits behind nor fills up the login queue.
+        """
+        passwords = list(passwords)
+        if not passwords:
+            return []
+        workers = min(workers or os.cpu_count() or 1, len(passwords))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt-bulk') as pool:
+            hashes = list(pool.map(lambda password: self.bcrypt.generate_password_hash(password).decode('utf-8'),
+                                   passwords))
+        with self._lock:
+            self.bulk_hashed += len(hashes)
+        return hashes
+
+    def needs_rehash(self, pw_hash):
+        """True when a stored hash was made with a lower cost than the configured one, or an unreadable one
+
+        Stronger hashes are kept, so workers configured differently for a
+        while never rehash the same account back and forth.
+        """
+        rounds = hash_rounds(pw_hash)
+        return rounds is None or rounds < self.rounds
+
+    def rehash_later(self, app, password, save):
+        """Hash `password` at the current cost on the pool without waiting for it
+
+        `save(new_hash)` then runs on the pool thread inside an app context.
+        Skipped (returns None) when the pool is off or full: the next login
+        will try again.
+        """
+        if self._executor is None:
+            return None
+        with self._lock:
+            if self._pending >= self._limit:
+                return None
+            self._pending += 1
+
+        def rehash():
+            new_hash = self.bcrypt.generate_password_hash(password).decode('utf-8')
+            with app.app_context():
+                save(new_hash)
+            with self._lock:
+                self.rehashed += 1
+
+        future = self._executor.submit(rehash)
+        future.add_done_callback(self._release)
+        return future
+
+    def calibrate(self, target_ms, min_rounds=4, max_rounds=16):
+        """Highest cost whose hash takes at most `target_ms` on this machine, never below `min_rounds`
+
+        Each extra round doubles the work, so rounds are tried upwards from
+        `min_rounds` until the next one would overshoot the target.
+        """
+        rounds = min_rounds
+        elapsed = self._time_hash(rounds)
+        while rounds < max_rounds and elapsed * 2 <= target_ms:
+            rounds += 1
+            elapsed = self._time_hash(rounds)
+        if elapsed > target_ms and rounds > min_rounds:
+            rounds -= 1
+        return rounds
+
+    def _time_hash(self, rounds):
+        start = time.perf_counter()
+        self.bcrypt.generate_password_hash('calibration', rounds)
+        return (time.perf_counter() - start) * 1000
+
+    def run(self, work):
+        """Run `work()` on the pool and wait for its result; inline when the pool is not set up"""
+        if self._executor is None:
+            return work()
+        with self._lock:
+            if self._pending >= self._limit:
+                self.rejected += 1
+                raise HashingBusy("Password hashing is saturated, retry shortly")
+            self._pending += 1
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            try:
+                return work()
+            finally:
+                with self._lock:
+                    self.wait_seconds += started - submitted
+                    self.hash_seconds += time.perf_counter() - started
+                    self.completed += 1
+
+        future = self._executor.submit(timed)
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            with self._lock:
+                self.timed_out += 1
+            raise HashingBusy("Password hashing timed out, retry shortly")
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'limit': self._limit,
+                'pending': self._pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+                'rehashed': self.rehashed,
+                'bulk_hashed': self.bulk_hashed,
+                'rounds': self.rounds,
+                'avg_wait_ms': 1000 * self.wait_seconds / self.completed if self.completed else 0.0,
+                'avg_hash_ms': 1000 * self.hash_seconds / self.completed if self.completed else 0.0,
+            }
@@ -1,15 +1,15 @@
-import uuid
 from datetime import datetime
 from app import db  # Assuming you have set up SQLAlchemy in your Flask app
+from app.models.ids import CompactID, new_id
 
 class BaseModel(db.Model):
     __abstract__ = True
     """Base model class for all models in the application"""
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = db.Column(CompactID(), primary_key=True, default=new_id)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
     def __init__(self):
-        self.id = str(uuid.uuid4())
+        self.id = new_id()
         self.created_at = datetime.now()
         self.updated_at = datetime.now()
 
@@ -1,11 +1,12 @@
 from app.models.BaseModel import BaseModel
+from app.models.ids import CompactID
 from app import db
 
 class Amenity(BaseModel):
     __tablename__ = 'amenities'
 
     name = db.Column(db.String(50), nullable=False)
-    owner_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=True)
+    owner_id = db.Column(CompactID(), db.ForeignKey('users.id'), nullable=True, index=True)
     owner = db.relationship('User', backref='amenities', lazy=True)
 
     def __init__(self, name):
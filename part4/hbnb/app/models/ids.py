@@ -0,0 +1,83 @@
+import os
+import secrets
+import threading
+import time
+import uuid
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import BINARY, LargeBinary, String, TypeDecorator
+
+# 'uuid4' (default): random UUIDs stored as 36-character strings.
+# 'uuid7': time-ordered UUIDv7 stored as 16 raw bytes (native uuid on PostgreSQL).
+# Read once at import because it decides the column types; every process
+# sharing a database must use the same value, and switching an existing
+# database needs its id columns converted.
+ID_STRATEGY = os.getenv('ID_STRATEGY', 'uuid4')
+
+_uuid7_lock = threading.Lock()
+_uuid7_last = (0, 0)
+
+
+def uuid7():
+    """A UUIDv7 (RFC 9562): 48-bit Unix milliseconds, then a 12-bit counter, then random bits
+
+    The counter keeps ids created within the same millisecond in creation
+    order; if it overflows, the timestamp is advanced by one millisecond.
+    """
+    global _uuid7_last
+    with _uuid7_lock:
+        millis = time.time_ns() // 1_000_000
+        last_millis, last_counter = _uuid7_last
+        if millis <= last_millis:
+            millis, counter = last_millis, last_counter + 1
+            if counter > 0xFFF:
+                millis, counter = millis + 1, 0
+        else:
+            counter = secrets.randbits(11)
+        _uuid7_last = (millis, counter)
+    value = (millis << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | secrets.randbits(62)
+    return uuid.UUID(int=value)
+
+
+def new_id():
+    """A new primary key in its string form, following ID_STRATEGY"""
+    return str(uuid7() if ID_STRATEGY == 'uuid7' else uuid.uuid4())
+
+
+class CompactID(TypeDecorator):
+    """Ids are 36-character strings in Python; with `compact` they are stored as 16 bytes
+
+    Byte order matches the order of the canonical string, so keyset
+    pagination on ids sorts the same either way. A value that is not a
+    UUID (e.g. an id typed into a URL) is bound as its UTF-8 bytes (NULL
+    on PostgreSQL), which never match a stored key, so lookups miss
+    instead of raising.
+    """
+    impl = String(36)
+    cache_ok = True
+
+    def __init__(self, compact=None):
+        super().__init__()
+        self.compact = ID_STRATEGY == 'uuid7' if compact is None else compact
+
+    def load_dialect_impl(self, dialect):
+        if not self.compact:
+            return dialect.type_descriptor(String(36))
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=False))
+        if dialect.name == 'sqlite':
+            return dialect.type_descriptor(LargeBinary(16))
+        return dialect.type_descriptor(BINARY(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None or not self.compact:
+            return value
+        try:
+            key = uuid.UUID(value)
+        except (TypeError, ValueError):
+            return None if dialect.name == 'postgresql' else str(value).encode('utf-8')
+        return str(key) if dialect.name == 'postgresql' else key.bytes
+
+    def process_result_value(self, value, dialect):
+        if value is None or not self.compact or dialect.name == 'postgresql':
+            return value
+        return str(uuid.UUID(bytes=bytes(value)))
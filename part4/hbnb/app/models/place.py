@@ -1,35 +1,54 @@
 from app.models.BaseModel import BaseModel
+from app.models.ids import CompactID
 from app.models.review import Review
 from app.models.amenity import Amenity
+from app.models.user import User
 from app import db
+from sqlalchemy import DDL, event
 
 place_amenity = db.Table('place_amenity',
-                         db.Column('place_id', db.String(36), db.ForeignKey('places.id'), primary_key=True),
-                         db.Column('amenity_id', db.String(36), db.ForeignKey('amenities.id'), primary_key=True))
+                         db.Column('place_id', CompactID(), db.ForeignKey('places.id'), primary_key=True),
+                         db.Column('amenity_id', CompactID(), db.ForeignKey('amenities.id'), primary_key=True),
+                         db.Index('ix_place_amenity_amenity_id', 'amenity_id'))
 
 class Place(BaseModel):
     __tablename__ = 'places'
+    __table_args__ = (db.Index('ix_places_created_at_id', 'created_at', 'id'),
+                      db.Index('ix_places_latitude_longitude', 'latitude', 'longitude'))
 
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(500), nullable=True)
-    price = db.Column(db.Float, nullable=False)
+    price = db.Column(db.Float, nullable=False, index=True)
     latitude = db.Column(db.Float, nullable=False)
     longitude = db.Column(db.Float, nullable=False)
 
-    owner_id = db.Column(db.String, db.ForeignKey('users.id'), nullable=False)
+    # Rating aggregates maintained by the facade on every review write
+    review_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    owner_id = db.Column(CompactID(), db.ForeignKey('users.id'), nullable=False, index=True)
 
     owner = db.relationship('User', backref='places', lazy=True)
 
     reviews = db.relationship('Review', backref='place', lazy=True)
     amenities = db.relationship('Amenity', secondary=place_amenity, lazy='subquery', backref=db.backref('places', lazy=True))
 
-    def __init__(self, title, description, price, latitude, longitude, owner_id, amenities=None):
+    def __init__(self, title, description, price, latitude, longitude, owner, amenities=None):
         super().__init__()
         self.title = self.validate_title(title)
+        self.description = description
         self.price = self.validate_price(price)
         self.latitude = self.validate_latitude(latitude)
         self.longitude = self.validate_longitude(longitude)
-        self.owner_id = self.validate_owner(owner_id)
+        self.owner = self.validate_owner(owner)
+        self.review_count = 0
+        self.rating_sum = 0
+
+    @property
+    def average_rating(self):
+        if not self.review_count:
+            return None
+        return self.rating_sum / self.review_count
 
     def validate_title(self, title):
         if not title or len(title) > 100:
@@ -51,12 +70,10 @@ class Place(BaseModel):
             raise ValueError("Longitude must be between -180.0 and 180.0.")
         return longitude
 
-    def validate_owner(self, owner_id):
-        from app.services import facade
-        owner = facade.user_repo.get(owner_id)
-        if not owner:
-            raise ValueError("Owner must be a valid User instance.")
-        return owner_id
+    def validate_owner(self, owner):
+        if not isinstance(owner, User):
+            raise TypeError("Owner must be a valid User instance.")
+        return owner
 
     def add_review(self, review):
         if not isinstance(review, Review):
@@ -80,4 +97,15 @@ class Place(BaseModel):
         return (f"Place({self.id}, {self.title}, {self.price}, "
                 f"Latitude: {self.latitude}, Longitude: {self.longitude}, "
                 f"Owner: {self.owner.first_name} {self.owner.last_name}, "
-                f"Created at: {self.created_at}, Last updated: {self.updated_at})")
\ No newline at end of file
+                f"Created at: {self.created_at}, Last updated: {self.updated_at})")
+
+
+# SQLite R*Tree over place coordinates, used by the bounding-box search.
+# Keys are a 63-bit hash of the place id (see PlaceRepository.spatial_key)
+# so they survive VACUUM, which may renumber rowids.
+PLACES_RTREE_DDL = ("CREATE VIRTUAL TABLE IF NOT EXISTS places_rtree "
+                    "USING rtree(id, min_lat, max_lat, min_lng, max_lng, +place_id)")
+event.listen(Place.__table__, 'after_create', DDL(PLACES_RTREE_DDL).execute_if(dialect='sqlite'))
+event.listen(Place.__table__, 'after_drop', DDL(
+    "DROP TABLE IF EXISTS places_rtree"
+).execute_if(dialect='sqlite'))
@@ -1,20 +1,24 @@
 from app.models.BaseModel import BaseModel
+from app.models.ids import CompactID
 from app import db
 
 class Review(BaseModel):
     __tablename__ = 'reviews'
+    __table_args__ = (db.Index('ix_reviews_place_id_created_at', 'place_id', 'created_at', 'id'),
+                      db.Index('ix_reviews_place_id_rating', 'place_id', 'rating', 'id'))
 
     text = db.Column(db.String(500), nullable=False)
     rating = db.Column(db.Integer, nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    place_id = db.Column(db.Integer, db.ForeignKey('places.id'), nullable=False)
+    # Same type as the keys they reference; place_id lookups use the composite indexes above
+    user_id = db.Column(CompactID(), db.ForeignKey('users.id'), nullable=False, index=True)
+    place_id = db.Column(CompactID(), db.ForeignKey('places.id'), nullable=False)
 
-    def __init__(self, text, rating, place_id, user_id):
+    def __init__(self, text, rating, place, user):
         super().__init__()
         self.text = self.validate_text(text)
         self.rating = self.validate_rating(rating)
-        self.place_id = self.validate_place(place_id)
-        self.user_id = self.validate_user(user_id)
+        self.place = self.validate_place(place)
+        self.user = self.validate_user(user)
 
     def validate_text(self, text):
         if not text:
@@ -26,19 +30,17 @@ class Review(BaseModel):
             raise ValueError("Rating must be between 1 and 5.")
         return rating
 
-    def validate_place(self, place_id):
-        from app.services import facade
-        place = facade.place_repo.get(place_id)
-        if not place:
-            raise ValueError("Place must be a valid Place instance.")
-        return place_id
-
-    def validate_user(self, user_id):
-        from app.services import facade
-        user = facade.user_repo.get(user_id)
-        if not user:
-            raise ValueError("User must be a valid User instance.")
-        return user_id
+    def validate_place(self, place):
+        from app.models.place import Place
+        if not isinstance(place, Place):
+            raise TypeError("Place must be a valid Place instance.")
+        return place
+
+    def validate_user(self, user):
+        from app.models.user import User
+        if not isinstance(user, User):
+            raise TypeError("User must be a valid User instance.")
+        return user
 
     def __str__(self):
         return (f"Review({self.id}, {self.text[:30]}..., Rating: {self.rating}, "
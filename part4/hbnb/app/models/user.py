@@ -1,7 +1,7 @@
 import re
 import uuid
 from app.models.BaseModel import BaseModel
-from app import db, bcrypt
+from app import db, hasher
 
 
 class User(BaseModel):
@@ -9,19 +9,24 @@ class User(BaseModel):
 
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
+    # Always stored normalized (see normalize_email); the unique index serves lookups
     email = db.Column(db.String(120), nullable=False, unique=True)
     password = db.Column(db.String(128), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
 
     reviews = db.relationship('Review', backref='user', lazy=True, cascade='all, delete')
 
-    def __init__(self, first_name, last_name, email, password, is_admin=False):
+    def __init__(self, first_name, last_name, email, password=None, is_admin=False, password_hash=None):
+        """Validate and build a user; pass `password_hash` instead of `password` when it was hashed already"""
         super().__init__()
         self.first_name = self.validate_first_name(first_name)
         self.last_name = self.validate_last_name(last_name)
         self.email = self.validate_email(email)
         self.is_admin = is_admin
-        self.hash_password(password)
+        if password_hash is not None:
+            self.password = password_hash
+        else:
+            self.hash_password(password)
 
     def validate_first_name(self, first_name):
         if not first_name or len(first_name) > 50:
@@ -33,11 +38,16 @@ class User(BaseModel):
             raise ValueError("Last name must be non-empty and less than or equal to 50 characters.")
         return last_name
 
+    @staticmethod
+    def normalize_email(email):
+        """Canonical form stored in the unique email column and used for lookups"""
+        return email.strip().lower()
+
     def validate_email(self, email):
         email_regex = r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$'
-        if not re.match(email_regex, email):
+        if not isinstance(email, str) or not re.match(email_regex, email.strip()):
             raise ValueError("Email must be in a valid format.")
-        return email
+        return self.normalize_email(email)
 
     def add_place(self, place):
         from app.models.place import Place
@@ -53,10 +63,10 @@ class User(BaseModel):
         return f"User({self.id}, {self.first_name} {self.last_name}, {self.email}, Admin: {self.is_admin}, Created at: {self.created_at}, Last updated: {self.updated_at})"
 
     def hash_password(self, password):
-        self.password = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password = hasher.hash(password)
         if len(self.password) == 60 and self.password.startswith('$2b$'):
             return True
         return False
 
     def verify_password(self, password):
-        return bcrypt.check_password_hash(self.password, password)
\ No newline at end of file
+        return hasher.verify(self.password, password)
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""Versioned schema migrations
+
+db.create_all() creates missing tables but never alters an existing one,
+so changes to tables that already hold data are written here as numbered
+steps. upgrade() runs the steps newer than the version recorded in the
+schema_migrations table, each in its own transaction. Every step must
+also be a no-op on a database that create_all() just built from the
+current models, because create_app runs create_all() first.
+"""
+import warnings
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text, update
+from app.models.amenity import Amenity
+from app.models.place import PLACES_RTREE_DDL, Place, place_amenity
+from app.models.review import Review
+from app.models.user import User
+from app.services.repositories.place_repository import PlaceRepository, places_rtree
+
+schema_migrations = Table(
+    'schema_migrations', MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def register(step):
+        MIGRATIONS.append((version, description, step))
+        MIGRATIONS.sort(key=lambda entry: entry[0])
+        return step
+    return register
+
+
+def current_version(connection):
+    schema_migrations.create(connection, checkfirst=True)
+    return connection.execute(select(func.coalesce(func.max(schema_migrations.c.version), 0))).scalar()
+
+
+def upgrade(engine, target=None):
+    """Apply the pending migrations up to `target` (default: all); returns the versions applied"""
+    applied = []
+    for version, description, step in MIGRATIONS:
+        if target is not None and version > target:
+            break
+        with engine.begin() as connection:
+            if version <= current_version(connection):
+                continue
+            step(connection)
+            connection.execute(schema_migrations.insert().values(
+                version=version, description=description, applied_at=datetime.now()))
+        applied.append(version)
+    return applied
+
+
+def _retype_columns_sqlite(connection, table, columns):
+    """Rebuild `table` from its model, since SQLite cannot change a column's type in place"""
+    existing = [column['name'] for column in inspect(connection).get_columns(table.name)]
+    # The copy's foreign keys need the tables they reference in the same MetaData
+    metadata = MetaData()
+    for other in table.metadata.sorted_tables:
+        if other is not table:
+            other.to_metadata(metadata)
+    rebuilt = table.to_metadata(metadata, name=f'{table.name}_migrating')
+    # The indexes are recreated under their real names once the old table is gone
+    rebuilt.indexes.clear()
+    rebuilt.create(connection)
+    copied = [name for name in existing if name in rebuilt.c]
+    selected = [f'CAST({name} AS VARCHAR(36))' if name in columns else name
+                for name in copied]
+    connection.execute(text(f"INSERT INTO {rebuilt.name} ({', '.join(copied)}) "
+                            f"SELECT {', '.join(selected)} FROM {table.name}"))
+    connection.execute(text(f'DROP TABLE {table.name}'))
+    connection.execute(text(f'ALTER TABLE {rebuilt.name} RENAME TO {table.name}'))
+
+
+def _retype_columns(connection, table, columns):
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        _retype_columns_sqlite(connection, table, columns)
+        return
+    for name in columns:
+        if dialect == 'postgresql':
+            statement = f'ALTER TABLE {table.name} ALTER COLUMN {name} TYPE VARCHAR(36) USING {name}::varchar'
+        else:
+            statement = f'ALTER TABLE {table.name} MODIFY {name} VARCHAR(36) NOT NULL'
+        connection.execute(text(statement))
+
+
+@migration(1, 'String review keys and indexes on the foreign keys')
+def index_foreign_keys(connection):
+    inspector = inspect(connection)
+    tables = set(inspector.get_table_names())
+    if Review.__tablename__ in tables:
+        columns = {column['name']: column['type'] for column in inspector.get_columns(Review.__tablename__)}
+        stale = [name for name in ('user_id', 'place_id') if isinstance(columns.get(name), Integer)]
+        if stale:
+            _retype_columns(connection, Review.__table__, stale)
+    for table in (Review.__table__, Place.__table__, Amenity.__table__, place_amenity):
+        if table.name in tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+
+
+@migration(2, 'Rating aggregate columns on places')
+def add_rating_aggregates(connection):
+    existing = {column['name'] for column in inspect(connection).get_columns(Place.__tablename__)}
+    for name in ('review_count', 'rating_sum'):
+        if name not in existing:
+            connection.execute(text(f'ALTER TABLE {Place.__tablename__} '
+                                    f'ADD COLUMN {name} INTEGER NOT NULL DEFAULT 0'))
+    # Same statement as PlaceRepository.rebuild_rating_aggregates
+    connection.execute(update(Place.__table__).values(
+        review_count=select(func.count(Review.id))
+        .where(Review.place_id == Place.id).scalar_subquery(),
+        rating_sum=select(func.coalesce(func.sum(Review.rating), 0))
+        .where(Review.place_id == Place.id).scalar_subquery()
+    ))
+
+
+@migration(3, 'R*Tree index over place coordinates')
+def index_place_locations(connection):
+    if connection.dialect.name != 'sqlite':
+        return
+    connection.execute(text(PLACES_RTREE_DDL))
+    places = Place.__table__
+    rows = [{'id': PlaceRepository.spatial_key(place_id), 'min_lat': latitude, 'max_lat': latitude,
+             'min_lng': longitude, 'max_lng': longitude, 'place_id': place_id}
+            for place_id, latitude, longitude
+            in connection.execute(select(places.c.id, places.c.latitude, places.c.longitude))]
+    if rows:
+        connection.execute(places_rtree.insert().prefix_with('OR REPLACE'), rows)
+
+
+@migration(4, 'Lowercase user emails')
+def normalize_emails(connection):
+    """Store every email in User.normalize_email form, except case variants of one address
+
+    Those would collide on the unique index, so they are left as they are
+    and reported, to be merged or renamed by hand.
+    """
+    users = User.__table__
+    owners = defaultdict(list)
+    for user_id, email in connection.execute(select(users.c.id, users.c.email)):
+        owners[User.normalize_email(email)].append((user_id, email))
+    for normalized, rows in owners.items():
+        if len(rows) > 1:
+            warnings.warn(f"Emails differing only in case were left unchanged: "
+                          f"{', '.join(email for _, email in rows)}")
+            continue
+        user_id, email = rows[0]
+        if email != normalized:
+            connection.execute(update(users).where(users.c.id == user_id).values(email=normalized))
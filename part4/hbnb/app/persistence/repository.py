@@ -1,6 +1,93 @@
+import base64
+import json
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from functools import wraps
+from datetime import datetime
+from sqlalchemy import and_, func, or_
+from sqlalchemy.exc import IntegrityError
 from app import db
 
+
+def encode_cursor(obj):
+    """Encode the (created_at, id) position of an object into an opaque cursor"""
+    key = [obj.created_at.isoformat(), obj.id]
+    return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor back into a (created_at, id) key"""
+    try:
+        created_at, obj_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(created_at), str(obj_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+@contextmanager
+def unit_of_work(expire_on_commit=None):
+    """Run several repository writes as one transaction
+
+    Inside the block repositories flush instead of committing; the
+    outermost block commits once when it exits normally and rolls back if
+    it raises. Blocks nest, so a facade method may call another one.
+    `expire_on_commit` overrides the session setting for that commit:
+    False keeps freshly written objects loaded so the caller can serialize
+    them without a reload; None leaves the session default.
+    """
+    session = db.session()
+    depth = session.info.get('unit_of_work', 0)
+    session.info['unit_of_work'] = depth + 1
+    try:
+        yield session
+        if depth == 0:
+            previous = session.expire_on_commit
+            if expire_on_commit is not None:
+                session.expire_on_commit = expire_on_commit
+            try:
+                session.commit()
+            finally:
+                session.expire_on_commit = previous
+    except BaseException:
+        if depth == 0:
+            session.rollback()
+        raise
+    finally:
+        session.info['unit_of_work'] = depth
+
+
+def in_unit_of_work():
+    return db.session().info.get('unit_of_work', 0) > 0
+
+
+@contextmanager
+def read_replica():
+    """Let the reads inside the block go to a read replica
+
+    Routing is up to the session (see app.engine.RoutingSession): without
+    READ_REPLICAS configured, or once the session has written, the reads
+    stay on the primary. Blocks nest.
+    """
+    session = db.session()
+    depth = session.info.get('read_replica', 0)
+    session.info['read_replica'] = depth + 1
+    try:
+        yield session
+    finally:
+        session.info['read_replica'] = depth
+
+
+def replica_read(method):
+    """Run a read-only facade method inside read_replica()
+
+    Only for methods that finish their queries before returning: a lazy
+    query or generator handed back to the caller would run on the primary.
+    """
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        with read_replica():
+            return method(*args, **kwargs)
+    return wrapper
+
 class Repository(ABC):
     @abstractmethod
     def add(self, obj):
@@ -26,32 +113,199 @@ class Repository(ABC):
     def get_by_attribute(self, attr_name, attr_value):
         pass
 
+    @abstractmethod
+    def add_many(self, objs):
+        pass
+
+    @abstractmethod
+    def get_many(self, obj_ids):
+        """Return (objects in input order, missing ids)"""
+        pass
+
+    @abstractmethod
+    def update_many(self, updates):
+        """Apply {obj_id: data}; return (updated objects in input order, missing ids)"""
+        pass
+
+    @abstractmethod
+    def delete_many(self, obj_ids):
+        """Delete the given ids; return how many objects were deleted"""
+        pass
+
+class InMemoryRepository(Repository):
+    def __init__(self):
+        self._storage = {}
+
+    def add(self, obj):
+        self._storage[obj.id] = obj
+
+    def add_many(self, objs):
+        for obj in objs:
+            self._storage[obj.id] = obj
+
+    def get(self, obj_id):
+        return self._storage.get(obj_id)
+
+    def get_all(self):
+        return list(self._storage.values())
+
+    def get_many(self, obj_ids):
+        obj_ids = list(obj_ids)
+        objects = [self._storage[obj_id] for obj_id in obj_ids if obj_id in self._storage]
+        missing = [obj_id for obj_id in dict.fromkeys(obj_ids) if obj_id not in self._storage]
+        return objects, missing
+
+    def update(self, obj_id, data):
+        obj = self.get(obj_id)
+        if obj:
+            obj.update(data)
+
+    def update_many(self, updates):
+        objects, missing = self.get_many(updates)
+        for obj in objects:
+            obj.update(updates[obj.id])
+        return objects, missing
+
+    def delete(self, obj_id):
+        if obj_id in self._storage:
+            del self._storage[obj_id]
+
+    def delete_many(self, obj_ids):
+        deleted = 0
+        for obj_id in dict.fromkeys(obj_ids):
+            if self._storage.pop(obj_id, None) is not None:
+                deleted += 1
+        return deleted
+
+    def get_by_attribute(self, attr_name, attr_value):
+        return next((obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value), None)
+
 class SQLAlchemyRepository(Repository):
+    # Stays well below SQLite's bound-parameter limit
+    IN_CHUNK_SIZE = 500
+
     def __init__(self, model):
         self.model = model
 
+    def _commit(self):
+        """Commit, or only flush when a unit of work will commit later
+
+        Outside a unit of work an IntegrityError rolls the session back
+        before propagating; inside one, the unit of work rolls back.
+        """
+        if in_unit_of_work():
+            db.session.flush()
+            return
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            raise
+
     def add(self, obj):
         db.session.add(obj)
-        db.session.commit()
+        self._commit()
 
-    def get(self, obj_id):
-        return self.model.query.get(obj_id)
+    def add_many(self, objs):
+        """Insert several objects in one transaction; rolled back as a whole on IntegrityError"""
+        db.session.add_all(objs)
+        self._commit()
+
+    def get(self, obj_id, options=()):
+        return self.model.query.options(*options).get(obj_id)
 
     def get_all(self):
         return self.model.query.all()
 
+    def get_many(self, obj_ids, options=()):
+        """Fetch several objects with IN queries; returns (objects in input order, missing ids)"""
+        obj_ids = list(obj_ids)
+        found = {}
+        unique_ids = list(dict.fromkeys(obj_ids))
+        for start in range(0, len(unique_ids), self.IN_CHUNK_SIZE):
+            chunk = unique_ids[start:start + self.IN_CHUNK_SIZE]
+            for obj in self.model.query.options(*options).filter(self.model.id.in_(chunk)):
+                found[obj.id] = obj
+        objects = [found[obj_id] for obj_id in obj_ids if obj_id in found]
+        missing = [obj_id for obj_id in unique_ids if obj_id not in found]
+        return objects, missing
+
+    def _ordered_query(self, options, criteria, columns):
+        """Query in (created_at, id) order, of entities or, with `columns`, of light rows
+
+        Rows carry id and created_at besides `columns`, so they can still be
+        turned into cursors, but no ORM object is built for them.
+        """
+        if columns:
+            extra = [c for c in columns if c.key not in ('id', 'created_at')]
+            query = db.session.query(self.model.id, self.model.created_at, *extra)
+        else:
+            query = self.model.query.options(*options)
+        return query.filter(*criteria).order_by(self.model.created_at, self.model.id)
+
+    def get_page(self, limit, after=None, options=(), criteria=(), columns=()):
+        """Return up to `limit` objects (or `columns` rows) in (created_at, id) order, starting after the `after` key"""
+        query = self._ordered_query(options, criteria, columns)
+        if after:
+            created_at, obj_id = after
+            query = query.filter(or_(
+                self.model.created_at > created_at,
+                and_(self.model.created_at == created_at, self.model.id > obj_id)
+            ))
+        return query.limit(limit).all()
+
+    def iter_all(self, batch_size, options=(), criteria=(), columns=()):
+        """Iterate over every object (or `columns` row) in (created_at, id) order, fetching `batch_size` rows at a time"""
+        return self._ordered_query(options, criteria, columns).yield_per(batch_size)
+
+    def get_version(self, obj_id):
+        """updated_at of one object, read without loading it; None when it does not exist"""
+        return db.session.query(self.model.updated_at).filter(self.model.id == obj_id).scalar()
+
+    def get_collection_version(self, criteria=()):
+        """(max updated_at, count) of the objects matching `criteria`, in one aggregate query"""
+        latest, count = db.session.query(func.max(self.model.updated_at), func.count(self.model.id)).filter(*criteria).one()
+        return latest, count
+
     def update(self, obj_id, data):
         obj = self.get(obj_id)
         if obj:
             for key, value in data.items():
                 setattr(obj, key, value)
-            db.session.commit()
+            self._commit()
+
+    def update_many(self, updates):
+        """Apply {obj_id: data} to several objects in one transaction; returns (objects, missing ids)
+
+        The rows are loaded with IN queries and the flush sends one
+        executemany UPDATE per set of changed columns.
+        """
+        objects, missing = self.get_many(updates)
+        for obj in objects:
+            for key, value in updates[obj.id].items():
+                setattr(obj, key, value)
+        if objects:
+            self._commit()
+        return objects, missing
 
     def delete(self, obj_id):
         obj = self.get(obj_id)
         if obj:
             db.session.delete(obj)
-            db.session.commit()
+            self._commit()
+
+    def delete_many(self, obj_ids):
+        """Delete several objects in one transaction; returns how many existed
+
+        Objects go through session.delete, so relationship cascades still
+        apply; the flush batches the DELETEs into one executemany.
+        """
+        objects, _ = self.get_many(dict.fromkeys(obj_ids))
+        for obj in objects:
+            db.session.delete(obj)
+        if objects:
+            self._commit()
+        return len(objects)
 
     def get_by_attribute(self, attr_name, attr_value):
         return self.model.query.filter_by(**{attr_name: attr_value}).first()
\ No newline at end of file
@@ -1,63 +1,216 @@
-from app.persistence.repository import SQLAlchemyRepository
+from app import hasher
+from app.persistence.repository import SQLAlchemyRepository, encode_cursor, decode_cursor, replica_read, unit_of_work
 from app.models.user import User
 from app.models.place import Place
 from app.models.amenity import Amenity
 from app.models.review import Review
 from app.services.repositories.user_repository import UserRepository
+from app.services.repositories.place_repository import PlaceRepository
+from app.services.repositories.review_repository import ReviewRepository
+from app.services.cache import VersionedCache
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
 
 
 class HBnBFacade:
+    # What the user listings serialize: no password hash, no relationships
+    USER_LIST_COLUMNS = (User.first_name, User.last_name, User.email)
+
     def __init__(self):
         self.user_repository = UserRepository()
-        self.place_repository = SQLAlchemyRepository(Place)
-        self.review_repository = SQLAlchemyRepository(Review)
+        self.place_repository = PlaceRepository()
+        self.review_repository = ReviewRepository()
         self.amenity_repository = SQLAlchemyRepository(Amenity)
+        self.place_cache = None
+
+    def configure_place_cache(self, enabled, size):
+        """Start a fresh place snapshot cache holding up to `size` places, or turn it off"""
+        self.place_cache = VersionedCache(size) if enabled else None
+
+    def place_cache_stats(self):
+        if self.place_cache is None:
+            return {'enabled': False}
+        return dict(self.place_cache.stats(), enabled=True)
+
+    def _invalidate_place(self, place_id):
+        if self.place_cache is not None:
+            self.place_cache.invalidate(place_id)
+
+    def _clear_place_cache(self):
+        if self.place_cache is not None:
+            self.place_cache.clear()
 
     ### Users section###
 
     def create_user(self, user_data):
+        """Register a user: the constructor hashes the password once and add() commits once
+
+        Email uniqueness is left to the unique index, so a duplicate costs
+        no extra lookup and two concurrent sign-ups cannot both succeed.
+        """
         user = User(**user_data)
-        self.user_repository.add(user)
+        try:
+            with unit_of_work(expire_on_commit=False):
+                self.user_repository.add(user)
+        except IntegrityError:
+            raise ValueError("Email already registered")
         return user
 
+    def bulk_create_users(self, rows, batch_size=1000, hash_workers=None):
+        """Register many users at once; returns one result per row, in input order
+
+        Rows are validated before any hashing, emails are deduplicated within
+        the batch and against the table with set-based queries, and the rest
+        are hashed in parallel and inserted `batch_size` per transaction.
+        A row's status is created, invalid, duplicate (an earlier row has the
+        same email) or exists (the email is already registered).
+        """
+        results = [None] * len(rows)
+        pending = []
+        seen = set()
+        for index, row in enumerate(rows):
+            if not isinstance(row, dict):
+                results[index] = {'row': index, 'status': 'invalid', 'error': 'Row must be a JSON object'}
+                continue
+            password = row.get('password')
+            try:
+                if not isinstance(password, str) or not password:
+                    raise ValueError("Password is required.")
+                user = User(first_name=row.get('first_name'), last_name=row.get('last_name'),
+                            email=row.get('email'), is_admin=bool(row.get('is_admin', False)),
+                            password_hash='')
+            except (ValueError, TypeError) as e:
+                results[index] = {'row': index, 'status': 'invalid', 'error': str(e)}
+                continue
+            if user.email in seen:
+                results[index] = {'row': index, 'email': user.email, 'status': 'duplicate'}
+                continue
+            seen.add(user.email)
+            pending.append((index, user, password))
+
+        taken = self.user_repository.existing_emails(user.email for _, user, _ in pending)
+        fresh = []
+        for index, user, password in pending:
+            if user.email in taken:
+                results[index] = {'row': index, 'email': user.email, 'status': 'exists'}
+            else:
+                fresh.append((index, user, password))
+
+        for start in range(0, len(fresh), batch_size):
+            batch = fresh[start:start + batch_size]
+            hashes = hasher.hash_many([password for _, _, password in batch], hash_workers)
+            for (_, user, _), pw_hash in zip(batch, hashes):
+                user.password = pw_hash
+            # Read before committing: commit expires the objects and reading back would reload each row
+            created = {index: {'row': index, 'email': user.email, 'status': 'created', 'id': user.id}
+                       for index, user, _ in batch}
+            try:
+                self.user_repository.add_many([user for _, user, _ in batch])
+            except IntegrityError:
+                # An email was registered since the check above: retry this batch row by row
+                for index, user, _ in batch:
+                    try:
+                        self.user_repository.add(user)
+                    except IntegrityError:
+                        created[index] = {'row': index, 'email': created[index]['email'], 'status': 'exists'}
+            for index, result in created.items():
+                results[index] = result
+        return results
+
     def get_user_by_id(self, user_id):
         return self.user_repository.get(user_id)
 
+    @replica_read
     def get_all_users(self):
         return self.user_repository.get_all()
 
+    def iter_all_users(self, batch_size):
+        """Stream every user as light (id, created_at, first_name, last_name, email) rows"""
+        return self.user_repository.iter_all(batch_size, columns=self.USER_LIST_COLUMNS)
+
+    @replica_read
+    def get_users_page(self, limit, cursor=None):
+        """Return one page of user rows (see iter_all_users) and the cursor of the next page"""
+        after = decode_cursor(cursor) if cursor else None
+        users = self.user_repository.get_page(limit + 1, after, columns=self.USER_LIST_COLUMNS)
+        next_cursor = None
+        if len(users) > limit:
+            users = users[:limit]
+            next_cursor = encode_cursor(users[-1])
+        return users, next_cursor
+
     def get_user_by_email(self, email):
-        return self.user_repository.get_by_attribute('email', email)
+        return self.user_repository.get_user_by_email(email)
 
-    def put_user(self, user_id, user_data):
+    def replace_password_hash(self, user_id, old_hash, new_hash):
+        return self.user_repository.replace_password_hash(user_id, old_hash, new_hash)
+
+    def update_user(self, user_id, user_data):
+        """Update a user, validating the email and hashing a new password; None when not found"""
         user = self.user_repository.get(user_id)
-        if user:
+        if not user:
+            return None
+        user_data = dict(user_data)
+        if 'password' in user_data:
+            user.hash_password(user_data.pop('password'))
+        if 'email' in user_data:
+            user_data['email'] = user.validate_email(user_data['email'])
+        try:
+            return self.put_user(user_id, user_data)
+        except IntegrityError:
+            # The unit of work has already rolled the session back
+            raise ValueError("Email already registered")
+
+    def put_user(self, user_id, user_data):
+        with unit_of_work():
+            user = self.user_repository.get(user_id)
+            if not user:
+                return None
             user.update(user_data)
+            self.place_repository.touch(Place.owner_id == user_id)
             self.user_repository.update(user_id, user_data)
-            return user
-        return None
+        # Snapshots embed the owner's name and email
+        self._clear_place_cache()
+        return user
 
     ### Amenity section###
 
     def create_amenity(self, amenity_data):
         name = amenity_data.get("name", "")
         new_amenity = Amenity(name=name)
-        self.amenity_repository.add(new_amenity)
+        with unit_of_work(expire_on_commit=False):
+            self.amenity_repository.add(new_amenity)
         return new_amenity
 
+    @replica_read
     def get_amenity(self, amenity_id):
         return self.amenity_repository.get(amenity_id)
 
+    @replica_read
     def get_all_amenities(self):
         return self.amenity_repository.get_all()
 
+    def iter_all_amenities(self, batch_size):
+        return self.amenity_repository.iter_all(batch_size)
+
+    @replica_read
+    def get_amenity_version(self, amenity_id):
+        return self.amenity_repository.get_version(amenity_id)
+
+    @replica_read
+    def get_amenities_version(self):
+        return self.amenity_repository.get_collection_version()
+
     def update_amenity(self, amenity_id, amenity_data):
-        amenity = self.amenity_repository.get(amenity_id)
-        if amenity:
+        with unit_of_work():
+            amenity = self.amenity_repository.get(amenity_id)
+            if not amenity:
+                return None
             amenity.update(amenity_data)
+            self.place_repository.touch_by_amenity(amenity_id)
             self.amenity_repository.update(amenity_id, amenity_data)
-            return amenity
-        return None
+        self._clear_place_cache()
+        return amenity
 
     ### Place section###
 
@@ -69,13 +222,10 @@ class HBnBFacade:
         if not owner:
             raise ValueError("Owner not found")
 
-        amenity_ids = place_data.get('amenities', [])
-        amenities = []
-        for amenity_id in amenity_ids:
-            amenity = self.amenity_repository.get(amenity_id)
-            if not amenity:
-                raise ValueError(f"Amenity {amenity_id} not found")
-            amenities.append(amenity)
+        amenity_ids = list(dict.fromkeys(place_data.get('amenities', [])))
+        amenities, missing = self.amenity_repository.get_many(amenity_ids)
+        if missing:
+            raise ValueError(f"Amenity {', '.join(missing)} not found")
 
         try:
             place = Place(
@@ -92,39 +242,106 @@ class HBnBFacade:
         for amenity in amenities:
             place.add_amenity(amenity)
 
-        self.place_repository.add(place)
+        # The row and its spatial index entry are committed together
+        with unit_of_work(expire_on_commit=False):
+            self.place_repository.add(place)
+            self.place_repository.index_location(place)
         return place
 
+    def _place_graph(self):
+        """Loader options fetching a place with its owner, amenities and reviewers in a fixed number of queries"""
+        return (
+            joinedload(Place.owner),
+            selectinload(Place.amenities),
+            selectinload(Place.reviews).joinedload(Review.user),
+        )
+
+    @replica_read
     def get_place(self, place_id):
-        place = self.place_repository.get(place_id)
+        place = self.place_repository.get(place_id, self._place_graph())
         if not place:
             raise ValueError("Place not found.")
         return place
 
+    def get_place_snapshot(self, place_id, version, serialize):
+        """Return `serialize(place)`, served from the place cache when it is enabled; None if not found
+
+        `version` is the place's updated_at as just read (see
+        get_place_version); a cached snapshot of any other version is
+        ignored, so a late write of an old snapshot or a stale entry in
+        another worker is never served. The cached snapshot is shared
+        between callers and must not be mutated.
+        """
+        if self.place_cache is not None:
+            snapshot = self.place_cache.get(place_id, version)
+            if snapshot is not None:
+                return snapshot
+        place = self.place_repository.get(place_id, self._place_graph())
+        if not place:
+            return None
+        snapshot = serialize(place)
+        if self.place_cache is not None:
+            self.place_cache.set(place_id, place.updated_at, snapshot)
+        return snapshot
+
+    def get_place_version(self, place_id):
+        return self.place_repository.get_version(place_id)
+
+    @replica_read
+    def get_places_version(self, filters=None):
+        criteria = self.place_repository.filter_criteria(**(filters or {}))
+        return self.place_repository.get_collection_version(criteria)
+
+    @replica_read
     def get_all_places(self):
         return self.place_repository.get_all()
 
+    def iter_all_places(self, batch_size, filters=None):
+        criteria = self.place_repository.filter_criteria(**(filters or {}))
+        return self.place_repository.iter_all(batch_size, self._place_graph(), criteria)
+
+    @replica_read
+    def get_places_page(self, limit, cursor=None, filters=None):
+        """Return one page of places and the cursor of the next page (None on the last page)
+
+        `filters` takes the keyword arguments of PlaceRepository.filter_criteria
+        (min_price, max_price, min_rating, amenity_ids, bbox).
+        """
+        after = decode_cursor(cursor) if cursor else None
+        criteria = self.place_repository.filter_criteria(**(filters or {}))
+        places = self.place_repository.get_page(limit + 1, after, self._place_graph(), criteria)
+        next_cursor = None
+        if len(places) > limit:
+            places = places[:limit]
+            next_cursor = encode_cursor(places[-1])
+        return places, next_cursor
+
+    def rebuild_rating_aggregates(self):
+        count = self.place_repository.rebuild_rating_aggregates()
+        self._clear_place_cache()
+        return count
+
     def update_place(self, place_id, data):
-        place = self.place_repository.get(place_id)
-        if not place:
-            return None
-        if "owner_id" in data:
-            new_owner = self.user_repository.get(data["owner_id"])
-            if not new_owner:
-                raise ValueError("Owner not found.")
-            place.owner = new_owner
-            data.pop("owner_id")
-        if "amenities" in data:
-            updated_amenities = []
-            for amenity_id in data["amenities"]:
-                amenity_obj = self.amenity_repository.get(amenity_id)
-                if amenity_obj:
-                    updated_amenities.append(amenity_obj)
-            place.amenities = updated_amenities
-            data.pop("amenities")
-
-        place.update(data)
-        self.place_repository.update(place_id, data)
+        with unit_of_work():
+            place = self.place_repository.get(place_id)
+            if not place:
+                return None
+            if "owner_id" in data:
+                new_owner = self.user_repository.get(data["owner_id"])
+                if not new_owner:
+                    raise ValueError("Owner not found.")
+                place.owner = new_owner
+                data.pop("owner_id")
+            if "amenities" in data:
+                updated_amenities, _ = self.amenity_repository.get_many(dict.fromkeys(data["amenities"]))
+                place.amenities = updated_amenities
+                data.pop("amenities")
+
+            place.update(data)
+            self.place_repository.update(place_id, data)
+            if "latitude" in data or "longitude" in data:
+                self.place_repository.index_location(place)
+        self._invalidate_place(place_id)
         return place
 
     ### Review section###
@@ -144,11 +361,14 @@ class HBnBFacade:
             user=user,
             place=place
         )
-        self.review_repository.add(new_review)
-        place.add_review(new_review)
-        self.place_repository.update(place.id, {"reviews": place.reviews})
+        # Insert first so the aggregate UPDATE does not autoflush a half-built review
+        with unit_of_work(expire_on_commit=False):
+            self.review_repository.add(new_review)
+            self.place_repository.apply_rating(place.id, 1, new_review.rating)
+        self._invalidate_place(place.id)
         return new_review
 
+    @replica_read
     def get_review(self, review_id):
         # Placeholder for logic to retrieve a review by ID
         review = self.review_repository.get(review_id)
@@ -156,25 +376,44 @@ class HBnBFacade:
             raise ValueError("Review not found")
         return review
 
+    @replica_read
     def get_all_reviews(self):
         # Placeholder for logic to retrieve all reviews
         return self.review_repository.get_all()
 
-    def get_reviews_by_place(self, place_id):
-        place = self.place_repository.get(place_id)
-        if not place:
+    def iter_all_reviews(self, batch_size):
+        return self.review_repository.iter_all(batch_size)
+
+    @replica_read
+    def get_review_version(self, review_id):
+        return self.review_repository.get_version(review_id)
+
+    @replica_read
+    def get_reviews_version(self, place_id=None):
+        criteria = () if place_id is None else (Review.place_id == place_id,)
+        return self.review_repository.get_collection_version(criteria)
+
+    @replica_read
+    def get_reviews_by_place(self, place_id, limit=None, offset=0, sort='created_at'):
+        # Existence check only: get() would also load the place's amenities
+        if self.place_repository.get_version(place_id) is None:
             raise ValueError("Place not found")
-        return [
-            review for review in self.review_repository.get_all()
-            if review.place.id == place_id
-        ]
+        return self.review_repository.get_by_place(place_id, limit, offset, sort)
 
     def update_review(self, review_id, review_data):
         # Placeholder for logic to update a review
         try:
             update_review = self.review_repository.get(review_id)
-            update_review.update(review_data)
-            self.review_repository.update(review_id, review_data)
+            rating_delta = 0
+            if "rating" in review_data:
+                new_rating = update_review.validate_rating(review_data["rating"])
+                rating_delta = new_rating - update_review.rating
+            with unit_of_work():
+                # Issued even without a rating change: it also bumps the place's updated_at
+                self.place_repository.apply_rating(update_review.place_id, 0, rating_delta)
+                update_review.update(review_data)
+                self.review_repository.update(review_id, review_data)
+            self._invalidate_place(update_review.place_id)
             return update_review
         except Exception as e:
             raise ValueError(f"Error updating review: {str(e)}")
@@ -182,7 +421,14 @@ class HBnBFacade:
     def delete_review(self, review_id):
         # Placeholder for logic to delete a review
         try:
-            self.review_repository.delete(review_id)      
+            with unit_of_work():
+                review = self.review_repository.get(review_id)
+                if review:
+                    self.place_repository.apply_rating(review.place_id, -1, -review.rating)
+                    place_id = review.place_id
+                self.review_repository.delete(review_id)
+            if review:
+                self._invalidate_place(place_id)
             return {"message": "Review deleted successfully"} 
         except ValueError:
                 raise ValueError("Review not found")
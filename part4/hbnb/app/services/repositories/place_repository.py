@@ -1,6 +1,112 @@
-from app.models.place import Place
-from app.services.repositories import SQLAlchemyRepository
+import hashlib
+from datetime import datetime
+from sqlalchemy import and_, bindparam, column, func, or_, select, table, text, update
+from app import db
+from app.models.place import Place, place_amenity
+from app.models.review import Review
+from app.persistence.repository import SQLAlchemyRepository
+
+places_rtree = table('places_rtree', column('id'), column('min_lat'), column('max_lat'),
+                     column('min_lng'), column('max_lng'), column('place_id', Place.id.type))
 
 class PlaceRepository(SQLAlchemyRepository):
     def __init__(self):
-        super().__init__(Place)
\ No newline at end of file
+        super().__init__(Place)
+
+    def filter_criteria(self, min_price=None, max_price=None, min_rating=None, amenity_ids=(), bbox=None):
+        """Translate the places list filters into SQL criteria"""
+        criteria = []
+        if min_price is not None:
+            criteria.append(Place.price >= min_price)
+        if max_price is not None:
+            criteria.append(Place.price <= max_price)
+        if min_rating is not None:
+            criteria.append(Place.review_count > 0)
+            criteria.append(Place.rating_sum >= min_rating * Place.review_count)
+        for amenity_id in amenity_ids:
+            equipped = select(place_amenity.c.place_id).where(place_amenity.c.amenity_id == amenity_id)
+            criteria.append(Place.id.in_(equipped))
+        if bbox is not None:
+            criteria.extend(self.bbox_criteria(*bbox))
+        return criteria
+
+    def uses_rtree(self):
+        return db.engine.dialect.name == 'sqlite'
+
+    @staticmethod
+    def spatial_key(place_id):
+        """Stable 63-bit integer key of a place in the R*Tree"""
+        digest = hashlib.blake2b(place_id.encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big') >> 1
+
+    def bbox_criteria(self, west, south, east, north):
+        """Criteria keeping the places inside a bounding box
+
+        A west edge greater than the east edge means the box crosses the
+        antimeridian. On SQLite the R*Tree narrows the candidates first;
+        its 32-bit coordinates are rounded outwards, so the exact column
+        comparisons below are still needed to drop the few false positives.
+        """
+        latitude = Place.latitude.between(south, north)
+        if west <= east:
+            longitude = Place.longitude.between(west, east)
+        else:
+            longitude = or_(Place.longitude >= west, Place.longitude <= east)
+        if not self.uses_rtree():
+            return [latitude, longitude]
+
+        rtree_latitude = and_(places_rtree.c.max_lat >= south, places_rtree.c.min_lat <= north)
+        if west <= east:
+            rtree_longitude = and_(places_rtree.c.max_lng >= west, places_rtree.c.min_lng <= east)
+        else:
+            rtree_longitude = or_(places_rtree.c.max_lng >= west, places_rtree.c.min_lng <= east)
+        candidates = select(places_rtree.c.place_id).where(rtree_latitude, rtree_longitude)
+        return [Place.id.in_(candidates), latitude, longitude]
+
+    def index_location(self, place):
+        """Insert or move a place in the R*Tree; a no-op on other engines"""
+        if not self.uses_rtree():
+            return
+        db.session.execute(
+            text("INSERT OR REPLACE INTO places_rtree (id, min_lat, max_lat, min_lng, max_lng, place_id) "
+                 "VALUES (:key, :lat, :lat, :lng, :lng, :place_id)")
+            .bindparams(bindparam('place_id', type_=Place.id.type)),
+            {'key': self.spatial_key(place.id), 'lat': place.latitude, 'lng': place.longitude,
+             'place_id': place.id}
+        )
+        self._commit()
+
+    def touch(self, *criteria):
+        """Bump updated_at of the matching places, inside the caller's transaction
+
+        Used when something embedded in a place's representation (its
+        owner, an amenity, a review's text) changes, so its ETag changes too.
+        """
+        db.session.execute(update(Place).where(*criteria).values(updated_at=datetime.now()))
+
+    def touch_by_amenity(self, amenity_id):
+        self.touch(Place.id.in_(select(place_amenity.c.place_id).where(place_amenity.c.amenity_id == amenity_id)))
+
+    def apply_rating(self, place_id, count_delta, sum_delta):
+        """Shift a place's rating aggregates in SQL, inside the caller's transaction"""
+        db.session.execute(
+            update(Place)
+            .where(Place.id == place_id)
+            .values(review_count=Place.review_count + count_delta,
+                    rating_sum=Place.rating_sum + sum_delta)
+        )
+
+    def rebuild_rating_aggregates(self):
+        """Recompute every place's aggregates from the reviews table; returns the number of places"""
+        result = db.session.execute(
+            update(Place).values(
+                review_count=select(func.count(Review.id))
+                .where(Review.place_id == Place.id).scalar_subquery(),
+                rating_sum=select(func.coalesce(func.sum(Review.rating), 0))
+                .where(Review.place_id == Place.id).scalar_subquery()
+            ),
+            execution_options={'synchronize_session': False}
+        )
+        self._commit()
+        db.session.expire_all()
+        return result.rowcount
@@ -1,6 +1,24 @@
 from app.models.review import Review
-from app.services.repositories import SQLAlchemyRepository
+from app.persistence.repository import SQLAlchemyRepository
 
 class ReviewRepository(SQLAlchemyRepository):
+    SORTS = {
+        'created_at': (Review.created_at.asc(), Review.id.asc()),
+        '-created_at': (Review.created_at.desc(), Review.id.desc()),
+        'rating': (Review.rating.asc(), Review.id.asc()),
+        '-rating': (Review.rating.desc(), Review.id.desc()),
+    }
+
     def __init__(self):
-        super().__init__(Review)
\ No newline at end of file
+        super().__init__(Review)
+
+    def get_by_place(self, place_id, limit, offset=0, sort='created_at'):
+        """Return one place's reviews through the (place_id, created_at|rating) indexes"""
+        if sort not in self.SORTS:
+            raise ValueError(f"sort must be one of {', '.join(self.SORTS)}")
+        return (self.model.query
+                .filter(self.model.place_id == place_id)
+                .order_by(*self.SORTS[sort])
+                .offset(offset)
+                .limit(limit)
+                .all())
@@ -1,3 +1,5 @@
+from sqlalchemy import update
+from app import db
 from app.models.user import User
 from app.persistence.repository import SQLAlchemyRepository
 
@@ -6,4 +8,21 @@ class UserRepository(SQLAlchemyRepository):
         super().__init__(User)
 
     def get_user_by_email(self, email):
-        return self.model.query.filter_by(email=email).first()
\ No newline at end of file
+        return self.model.query.filter_by(email=User.normalize_email(email)).first()
+
+    def existing_emails(self, emails):
+        """Subset of the given normalized emails already taken, one IN query per chunk"""
+        emails = list(emails)
+        taken = set()
+        for start in range(0, len(emails), self.IN_CHUNK_SIZE):
+            chunk = emails[start:start + self.IN_CHUNK_SIZE]
+            taken.update(email for (email,) in db.session.query(User.email).filter(User.email.in_(chunk)))
+        return taken
+
+    def replace_password_hash(self, user_id, old_hash, new_hash):
+        """Swap a password hash unless the password changed meanwhile; True when it was swapped"""
+        result = db.session.execute(
+            update(User).where(User.id == user_id, User.password == old_hash).values(password=new_hash)
+        )
+        self._commit()
+        return result.rowcount == 1
@@ -26,6 +26,7 @@ function setupLoginForm() {
       if (response.ok) {
         const data = await response.json();
         document.cookie = `token=${data.access_token}; path=/`;
+        document.cookie = `refresh_token=${data.refresh_token}; path=/`;
         userToken = data.access_token;
         window.location.href = 'index.html';
       } else {
@@ -45,32 +46,73 @@ function checkAuthentication() {
   if (loginLink) {
     loginLink.style.display = userToken ? 'none' : 'block';
   }
+  setupPriceFilter(userToken);
+  setupLoadMore(userToken);
   fetchPlaces(userToken);
 }
 
-async function fetchPlaces(token) {
+function getNextLink(response) {
+  const link = response.headers.get('Link');
+  if (!link) return null;
+  const match = link.match(/<([^>]+)>;\s*rel="next"/);
+  return match ? match[1] : null;
+}
+
+// Bumped by every new listing (e.g. a price filter change) so answers to older ones are dropped
+let placesListing = 0;
+let nextPlacesUrl = null;
+
+function fetchPlaces(token, filters = {}) {
+  const params = new URLSearchParams(filters);
+  const url = 'http://localhost:5000/api/v1/places' + (params.toString() ? `?${params}` : '');
+  placesListing += 1;
+  return fetchPlacesPage(token, url, placesListing, true);
+}
+
+// One page per call: the next one is only requested when the user asks for more
+async function fetchPlacesPage(token, url, listing, replace) {
   try {
-    const response = await fetch('http://localhost:5000/api/v1/places', {
+    const response = await fetch(url, {
       method: 'GET',
       headers: token ? { 'Authorization': `Bearer ${token}` } : {},
     });
+    if (listing !== placesListing) return;
 
-    if (response.ok) {
-      const places = await response.json();
-      displayPlaces(places);
-      setupPriceFilter(places);
-    } else {
+    if (!response.ok) {
       alert('Failed to fetch places');
+      return;
     }
+    const places = await response.json();
+    if (listing !== placesListing) return;
+    nextPlacesUrl = getNextLink(response);
+    displayPlaces(places, replace);
   } catch (error) {
     console.error('Error fetching places:', error);
   }
 }
 
-function displayPlaces(places) {
+function setupLoadMore(token) {
+  const button = document.getElementById('load-more');
+  if (!button) return;
+
+  button.addEventListener('click', () => {
+    if (!nextPlacesUrl) return;
+    const url = nextPlacesUrl;
+    nextPlacesUrl = null;
+    button.style.display = 'none';
+    fetchPlacesPage(token, url, placesListing, false);
+  });
+}
+
+function displayPlaces(places, replace = true) {
   const list = document.getElementById('places-list');
   if (!list) return;
-  list.innerHTML = '';
+  if (replace) list.innerHTML = '';
+
+  const loadMore = document.getElementById('load-more');
+  if (loadMore) {
+    loadMore.style.display = nextPlacesUrl ? 'block' : 'none';
+  }
 
   places.forEach(place => {
     const card = document.createElement('div');
@@ -87,7 +129,7 @@ function displayPlaces(places) {
   });
 }
 
-function setupPriceFilter(places) {
+function setupPriceFilter(token) {
   const filter = document.getElementById('price-filter');
   if (!filter) return;
 
@@ -100,10 +142,7 @@ function setupPriceFilter(places) {
 
   filter.addEventListener('change', (event) => {
     const maxPrice = event.target.value;
-    document.querySelectorAll('.place-card').forEach(card => {
-      const price = parseFloat(card.getAttribute('data-price'));
-      card.style.display = (maxPrice === 'All' || price <= parseFloat(maxPrice)) ? 'block' : 'none';
-    });
+    fetchPlaces(token, maxPrice === 'All' ? {} : { max_price: maxPrice });
   });
 }
 
@@ -180,7 +219,22 @@ function checkReviewAuth() {
   return token;
 }
 
-async function submitReview(token, placeId, reviewText, rating) {
+// Trade the refresh token for a new access token instead of asking for the password again
+async function refreshAccessToken() {
+  const refreshToken = getCookie('refresh_token');
+  if (!refreshToken) return null;
+  const response = await fetch('http://localhost:5000/api/v1/auth/refresh', {
+    method: 'POST',
+    headers: { 'Authorization': `Bearer ${refreshToken}` }
+  });
+  if (!response.ok) return null;
+  const data = await response.json();
+  document.cookie = `token=${data.access_token}; path=/`;
+  userToken = data.access_token;
+  return data.access_token;
+}
+
+async function submitReview(token, placeId, reviewText, rating, retried = false) {
   try {
     const response = await fetch('http://localhost:5000/api/v1/reviews', {
       method: 'POST',
@@ -195,6 +249,11 @@ async function submitReview(token, placeId, reviewText, rating) {
       })
     });
 
+    if (response.status === 401 && !retried) {
+      const freshToken = await refreshAccessToken();
+      if (freshToken) return submitReview(freshToken, placeId, reviewText, rating, true);
+    }
+
     if (response.ok) {
       alert('Review submitted successfully!');
       document.getElementById('review-form').reset();
@@ -0,0 +1,36 @@
+import time
+from flask_jwt_extended import JWTManager
+from app.services.cache import TTLCache
+
+
+class CachingJWTManager(JWTManager):
+    """JWTManager that remembers the claims of recently verified tokens
+
+    Hot tokens are decoded and signature-checked once per JWT_CLAIMS_CACHE_TTL
+    instead of on every request. An entry never outlives the token's own
+    exp, and only successful decodes are cached, so expired or tampered
+    tokens are still rejected. Blocklist checks run after decoding and are
+    not affected.
+    """
+
+    def __init__(self, app=None, add_context_processor=False):
+        self.claims_cache = None
+        super().__init__(app, add_context_processor)
+
+    def init_app(self, app, add_context_processor=False):
+        super().init_app(app, add_context_processor)
+        ttl = app.config.get('JWT_CLAIMS_CACHE_TTL', 0)
+        self.claims_cache = TTLCache(app.config.get('JWT_CLAIMS_CACHE_SIZE', 4096), ttl) if ttl > 0 else None
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        if self.claims_cache is None or allow_expired:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+        key = (encoded_token, csrf_value)
+        claims = self.claims_cache.get(key)
+        if claims is None:
+            claims = super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+            if 'exp' in claims:
+                self.claims_cache.set(key, claims, claims['exp'] - time.time())
+            else:
+                self.claims_cache.set(key, claims)
+        return claims
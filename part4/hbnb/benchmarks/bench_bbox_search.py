@@ -0,0 +1,125 @@
+"""Bounding-box search benchmark: R*Tree versus the plain column fallback
+
+Usage (from part4/hbnb):
+    python -m benchmarks.bench_bbox_search --places 1000000
+
+Fills a throw-away SQLite file with random places, then times small map
+viewports through PlaceRepository with and without the R*Tree.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+import config
+from app import create_app, db
+from app.services import facade
+
+
+def build_config(path):
+    class BenchConfig(config.Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+    return BenchConfig
+
+
+def populate(count):
+    repository = facade.place_repository
+    owner_id = str(uuid.uuid4())
+    now = datetime.now()
+    connection = db.session.connection().connection.driver_connection
+    connection.execute(
+        "INSERT INTO users (id, first_name, last_name, email, password, is_admin, created_at, updated_at) "
+        "VALUES (?, 'Bench', 'Owner', 'bench@example.com', 'x', 0, ?, ?)", (owner_id, now, now))
+    batch = 50000
+    for start in range(0, count, batch):
+        places, locations = [], []
+        for _ in range(min(batch, count - start)):
+            place_id = str(uuid.uuid4())
+            lat, lng = random.uniform(-60, 70), random.uniform(-180, 180)
+            places.append((place_id, 'Bench place', 100.0, lat, lng, owner_id, now, now))
+            locations.append((repository.spatial_key(place_id), lat, lat, lng, lng, place_id))
+        connection.executemany(
+            "INSERT INTO places (id, title, price, latitude, longitude, owner_id, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", places)
+        connection.executemany(
+            "INSERT INTO places_rtree (id, min_lat, max_lat, min_lng, max_lng, place_id) "
+            "VALUES (?, ?, ?, ?, ?, ?)", locations)
+    connection.commit()
+    connection.execute("ANALYZE")
+
+
+def viewports(count, size):
+    rng = random.Random(42)
+    for _ in range(count):
+        west, south = rng.uniform(-180, 180 - size), rng.uniform(-60, 70 - size)
+        yield west, south, west + size, south + size
+
+
+def time_queries(boxes, run):
+    timings = []
+    found = 0
+    for box in boxes:
+        start = time.perf_counter()
+        found += run(box)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), sorted(timings)[int(len(timings) * 0.99) - 1], found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--places', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--size', type=float, default=0.5, help='viewport edge in degrees')
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    app = create_app(build_config(path))
+    with app.app_context():
+        start = time.perf_counter()
+        populate(args.places)
+        print(f"inserted {args.places} places in {time.perf_counter() - start:.1f}s")
+
+        repository = facade.place_repository
+        boxes = list(viewports(args.queries, args.size))
+        connection = db.session.connection().connection.driver_connection
+
+        def raw_rtree(box):
+            west, south, east, north = box
+            return len(connection.execute(
+                "SELECT place_id FROM places_rtree "
+                "WHERE max_lat >= ? AND min_lat <= ? AND max_lng >= ? AND min_lng <= ?",
+                (south, north, west, east)).fetchall())
+
+        def raw_columns(box):
+            west, south, east, north = box
+            return len(connection.execute(
+                "SELECT id FROM places WHERE latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?",
+                (south, north, west, east)).fetchall())
+
+        for label, run in (('rtree', raw_rtree), ('fallback', raw_columns)):
+            median, p99, found = time_queries(boxes, run)
+            print(f"{label:<9} raw SQL     median {median:.3f} ms  p99 {p99:.3f} ms  ({found} rows)")
+
+        def ids_only(box):
+            query = db.session.query(repository.model.id).filter(*repository.bbox_criteria(*box))
+            return len(query.all())
+
+        def first_page(box):
+            return len(repository.get_page(20, criteria=repository.bbox_criteria(*box)))
+
+        for label, run in (('ids', ids_only), ('page of 20', first_page)):
+            median, p99, found = time_queries(boxes, run)
+            print(f"rtree     {label:<11} median {median:.3f} ms  p99 {p99:.3f} ms  ({found} rows)")
+            repository.uses_rtree = lambda: False
+            median, p99, found = time_queries(boxes, run)
+            print(f"fallback  {label:<11} median {median:.3f} ms  p99 {p99:.3f} ms  ({found} rows)")
+            del repository.uses_rtree
+
+
+if __name__ == '__main__':
+    main()
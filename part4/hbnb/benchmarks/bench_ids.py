@@ -0,0 +1,91 @@
+"""Primary key benchmark: random UUID4 strings versus time-ordered UUIDv7 in 16 bytes
+
+Usage (from part4/hbnb):
+    python -m benchmarks.bench_ids --reviews 10000000
+
+Fills a reviews-shaped table (primary key, indexed place_id and user_id)
+in a SQLite file for each id strategy, in batches of executemany inserts
+with the tuning profile on, and reports the insert rate of the last batch
+as well as the overall rate, with the size on disk of the table and of
+every index (from the dbstat virtual table).
+"""
+import argparse
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, create_engine, text
+
+import config
+from app.engine import apply_sqlite_pragmas, sqlite_pragmas
+from app.models.ids import CompactID, uuid7
+
+STRATEGIES = {
+    'uuid4 string': (lambda: String(36), lambda: str(uuid.uuid4())),
+    'uuid7 binary': (lambda: CompactID(compact=True), lambda: str(uuid7())),
+}
+
+
+def build_table(id_type):
+    metadata = MetaData()
+    return Table(
+        'reviews', metadata,
+        Column('id', id_type(), primary_key=True),
+        Column('place_id', id_type(), nullable=False),
+        Column('user_id', id_type(), nullable=False),
+        Column('text', String(500), nullable=False),
+        Column('rating', Integer, nullable=False),
+        Column('created_at', DateTime, nullable=False),
+        Index('ix_reviews_place_id_created_at', 'place_id', 'created_at', 'id'),
+        Index('ix_reviews_user_id', 'user_id'),
+    )
+
+
+def sizes(connection):
+    rows = connection.execute(text("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name ORDER BY name"))
+    return {name: size for name, size in rows}
+
+
+def run(label, count, batch_size):
+    id_type, new_id = STRATEGIES[label]
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'ids.db')}")
+    apply_sqlite_pragmas(engine, sqlite_pragmas(vars(config.Config)))
+    reviews = build_table(id_type)
+    reviews.create(engine)
+    places = [new_id() for _ in range(max(count // 10, 1))]
+    users = [new_id() for _ in range(max(count // 20, 1))]
+
+    start = time.perf_counter()
+    last_rate = 0.0
+    for offset in range(0, count, batch_size):
+        rows = [{'id': new_id(), 'place_id': places[i % len(places)], 'user_id': users[i % len(users)],
+                 'text': 'Lovely stay', 'rating': 4, 'created_at': datetime.now()}
+                for i in range(offset, min(offset + batch_size, count))]
+        batch_start = time.perf_counter()
+        with engine.begin() as connection:
+            connection.execute(reviews.insert(), rows)
+        last_rate = len(rows) / (time.perf_counter() - batch_start)
+    overall = count / (time.perf_counter() - start)
+    with engine.connect() as connection:
+        on_disk = sizes(connection)
+    engine.dispose()
+    return overall, last_rate, on_disk
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reviews', type=int, default=200_000)
+    parser.add_argument('--batch-size', type=int, default=10_000)
+    args = parser.parse_args()
+
+    for label in STRATEGIES:
+        overall, last_rate, on_disk = run(label, args.reviews, args.batch_size)
+        print(f"{label}  {overall:9.0f} rows/s overall  {last_rate:9.0f} rows/s last batch")
+        for name, size in on_disk.items():
+            print(f"    {name:34} {size / 2 ** 20:9.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Registration throughput benchmark: double-hash handler versus facade.create_user
+
+Usage (from part4/hbnb):
+    python -m benchmarks.bench_registration --users 50
+
+Registers users the way the handlers used to (the constructor hashes, then
+hash_password hashes again) and through the single-hash facade.create_user.
+The hashing pool is pinned to one worker, so the rates are per core.
+"""
+import argparse
+import os
+import tempfile
+import time
+import uuid
+
+import config
+from app import create_app, db
+from app.models.user import User
+from app.services import facade
+
+
+def build_config(path):
+    class BenchConfig(config.Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        HASH_WORKERS = 1
+    return BenchConfig
+
+
+def user_data():
+    return {'first_name': 'Bench', 'last_name': 'User',
+            'email': f'{uuid.uuid4().hex}@example.com', 'password': 'correct horse battery'}
+
+
+def double_hash(data):
+    user = User(**data)
+    db.session.add(user)
+    db.session.commit()
+    user.hash_password(data['password'])
+    db.session.commit()
+
+
+def single_hash(data):
+    facade.create_user(data)
+
+
+def rate(register, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        register(user_data())
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=50)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    app = create_app(build_config(path))
+    with app.app_context():
+        before = rate(double_hash, args.users)
+        after = rate(single_hash, args.users)
+    print(f"before (double hash)  {before:.2f} registrations/s/core")
+    print(f"after  (single hash)  {after:.2f} registrations/s/core  ({after / before:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
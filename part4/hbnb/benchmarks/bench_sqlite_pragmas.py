@@ -0,0 +1,96 @@
+"""SQLite concurrency benchmark: default pragmas versus the SQLITE_* tuning profile
+
+Usage (from part4/hbnb):
+    python -m benchmarks.bench_sqlite_pragmas --readers 4 --writers 2 --seconds 5
+
+Runs reader threads (a 20-row page of amenities) and writer threads (one
+committed amenity insert each) against a file database, first with SQLite's
+defaults (rollback journal, synchronous=FULL) and then with the profile
+applied by create_app (WAL, synchronous=NORMAL, busy_timeout, ...).
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+
+import config
+from app import create_app, db
+from app.models.amenity import Amenity
+
+
+def build_config(path, tuned):
+    class BenchConfig(config.Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        SQLITE_TUNING = tuned
+    return BenchConfig
+
+
+def read(counter):
+    Amenity.query.order_by(Amenity.created_at.desc()).limit(20).all()
+    db.session.rollback()
+
+
+def write(counter):
+    db.session.add(Amenity(name=f'Amenity {counter}'))
+    db.session.commit()
+
+
+def worker(app, operation, deadline, results, key):
+    done = errors = 0
+    with app.app_context():
+        while time.perf_counter() < deadline:
+            try:
+                operation(done)
+                done += 1
+            except OperationalError:
+                # "database is locked": the default journal has no busy handler beyond the driver timeout
+                db.session.rollback()
+                errors += 1
+        db.session.remove()
+    results.append((key, done, errors))
+
+
+def run(tuned, readers, writers, seconds):
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    app = create_app(build_config(path, tuned))
+    with app.app_context():
+        db.session.add_all(Amenity(name=f'Seed {i}') for i in range(1000))
+        db.session.commit()
+
+    results = []
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=worker, args=(app, read, deadline, results, 'read')) for _ in range(readers)]
+    threads += [threading.Thread(target=worker, args=(app, write, deadline, results, 'write')) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with app.app_context():
+        db.engine.dispose()
+
+    totals = {'read': [0, 0], 'write': [0, 0]}
+    for key, done, errors in results:
+        totals[key][0] += done
+        totals[key][1] += errors
+    return {key: (done / seconds, errors) for key, (done, errors) in totals.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    for label, tuned in (('defaults', False), ('tuned   ', True)):
+        rates = run(tuned, args.readers, args.writers, args.seconds)
+        print(f"{label}  reads {rates['read'][0]:8.1f}/s ({rates['read'][1]} errors)"
+              f"  writes {rates['write'][0]:7.1f}/s ({rates['write'][1]} errors)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,90 @@
 import os
 from datetime import timedelta
 
+
+def engine_options_from_env(uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for a pooled database, from DB_POOL_* and DB_STATEMENT_TIMEOUT_MS
+
+    pool_recycle closes connections older than that many seconds, before
+    the server or a proxy drops them; pool_pre_ping tests each connection
+    on checkout. The statement timeout is passed to the server on connect
+    where the driver supports it (PostgreSQL, MySQL); 0 leaves it unset.
+    """
+    options = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_POOL_MAX_OVERFLOW', 20)),
+        # whole seconds: Flask-SQLAlchemy's engine_from_config coerces it to int
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+    }
+    timeout_ms = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 0))
+    if timeout_ms:
+        if uri.startswith('postgresql'):
+            options['connect_args'] = {'options': f'-c statement_timeout={timeout_ms}'}
+        elif uri.startswith('mysql'):
+            options['connect_args'] = {'init_command': f'SET SESSION MAX_EXECUTION_TIME={timeout_ms}'}
+    return options
+
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
     DEBUG = False
 
     JWT_SECRET_KEY = SECRET_KEY
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
+    # Long-lived clients trade this at /api/v1/auth/refresh instead of re-posting credentials
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+    # Identities are {'id', 'is_admin'} dicts; PyJWT >= 2.10 rejects non-string subjects otherwise
+    JWT_VERIFY_SUB = False
+    # Verified claims of hot tokens are reused for up to this many seconds (0 = off)
+    JWT_CLAIMS_CACHE_TTL = int(os.getenv('JWT_CLAIMS_CACHE_TTL', 30))
+    JWT_CLAIMS_CACHE_SIZE = int(os.getenv('JWT_CLAIMS_CACHE_SIZE', 4096))
+
+    # Rows fetched per round trip when a list endpoint is called with ?stream=true
+    STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', 500))
+
+    # In-process LRU of serialized place details, invalidated by the facade on writes
+    PLACE_CACHE_ENABLED = os.getenv('PLACE_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    PLACE_CACHE_SIZE = int(os.getenv('PLACE_CACHE_SIZE', 1024))
+
+    # bcrypt runs on this many pool threads (0 = half the cores); calls beyond
+    # workers + queue limit, or waiting longer than the timeout, get a 503
+    HASH_WORKERS = int(os.getenv('HASH_WORKERS', 0))
+    HASH_QUEUE_LIMIT = int(os.getenv('HASH_QUEUE_LIMIT', 32))
+    HASH_TIMEOUT = float(os.getenv('HASH_TIMEOUT', 10))
+
+    # bcrypt cost, the same in every worker; `flask calibrate-bcrypt` measures the
+    # highest cost hashing within a time budget here, but not below the minimum.
+    # Stored hashes made at a lower cost are rehashed in the background on login.
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+    BCRYPT_MIN_ROUNDS = int(os.getenv('BCRYPT_MIN_ROUNDS', 10))
+
+    # POST /api/v1/admin/users/bulk: rows per request, rows per transaction,
+    # and threads hashing passwords (0 = every core)
+    BULK_IMPORT_MAX_ROWS = int(os.getenv('BULK_IMPORT_MAX_ROWS', 50000))
+    BULK_IMPORT_BATCH_SIZE = int(os.getenv('BULK_IMPORT_BATCH_SIZE', 1000))
+    BULK_HASH_WORKERS = int(os.getenv('BULK_HASH_WORKERS', 0))
+
+    # PRAGMAs run on every new SQLite connection: WAL lets readers run while a
+    # write commits, synchronous=NORMAL skips the per-commit fsync that WAL does
+    # not need, and busy_timeout makes writers wait for the lock instead of failing.
+    # cache_size is in pages, or KiB when negative; mmap_size is in bytes.
+    SQLITE_TUNING = os.getenv('SQLITE_TUNING', 'true').lower() in ('1', 'true', 'yes')
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', -64000))
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_TEMP_STORE = os.getenv('SQLITE_TEMP_STORE', 'MEMORY')
+    SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000))
+
+    # ID_STRATEGY (uuid4 | uuid7) is read from the environment by app.models.ids
+    # at import time rather than here, because it fixes the id column types.
+
+    # Comma-separated replica URLs; read-only facade calls made by GET requests
+    # are spread over them, per request, until the request writes something
+    SQLALCHEMY_BINDS = {f'replica_{i}': url for i, url in
+                        enumerate(filter(None, os.getenv('REPLICA_DATABASE_URLS', '').split(',')))}
+    READ_REPLICAS = list(SQLALCHEMY_BINDS)
 
 
 class DevelopmentConfig(Config):
@@ -15,8 +93,16 @@ class DevelopmentConfig(Config):
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
 
+class ProductionConfig(Config):
+    # Selected with APP_CONFIG=production (see create_app)
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///production.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options_from_env(SQLALCHEMY_DATABASE_URI)
+
+
 config = {
     'development': DevelopmentConfig,
+    'production': ProductionConfig,
     'default': DevelopmentConfig
 }
 class TestConfig(Config):
@@ -26,6 +112,7 @@ class TestConfig(Config):
 
 config = {
     'development': DevelopmentConfig,
+    'production': ProductionConfig,
     'default': DevelopmentConfig,
     'testing': TestConfig  # اختياري لو تبغى تستدعيه بالاسم
 }
\ No newline at end of file
@@ -0,0 +1,102 @@
+import json
+import unittest
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models.user import User
+from app.services import facade
+
+
+class AdminBulkUsersAPITestCase(unittest.TestCase):
+    """
+    This test case verifies POST /api/v1/admin/users/bulk:
+    JSON array and NDJSON bodies, deduplication and the per-row report.
+    """
+
+    def setUp(self):
+        """
+        Set up a test application with an admin, small import batches and admin/non-admin tokens.
+        """
+        self.app = create_app("config.TestConfig")
+        self.app.config.update(BULK_IMPORT_BATCH_SIZE=2, BCRYPT_LOG_ROUNDS=4)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        admin = facade.create_user({"first_name": "Admin", "last_name": "User",
+                                    "email": "admin@example.com", "password": "pw", "is_admin": True})
+        self.admin_token = create_access_token(identity={"id": admin.id, "is_admin": True})
+        self.user_token = create_access_token(identity={"id": admin.id, "is_admin": False})
+        self.client = self.app.test_client()
+        self.url = "/api/v1/admin/users/bulk"
+
+    def tearDown(self):
+        """
+        Remove the session and drop all tables after each test.
+        """
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _post(self, body, content_type="application/json", token=None):
+        return self.client.post(self.url, data=body, content_type=content_type,
+                                headers={"Authorization": f"Bearer {token or self.admin_token}"})
+
+    def _row(self, email, **fields):
+        return dict({"first_name": "Host", "last_name": "User", "email": email, "password": "pw"}, **fields)
+
+    def test_bulk_json_array_report(self):
+        """
+        Test that every row gets a status and only the valid, new ones are inserted.
+        """
+        rows = [self._row("a@example.com"), self._row("bad-email"), self._row("A@example.com"),
+                self._row("admin@example.com"), self._row("b@example.com", password=""),
+                self._row("c@example.com"), self._row("d@example.com"), "not an object"]
+        response = self._post(json.dumps(rows))
+        self.assertEqual(response.status_code, 200)
+        report = response.get_json()
+        self.assertEqual([r["status"] for r in report["results"]],
+                         ["created", "invalid", "duplicate", "exists", "invalid", "created", "created", "invalid"])
+        self.assertEqual(report["created"], 3)
+        self.assertEqual(report["failed"], 5)
+
+        created = facade.get_user_by_email("c@example.com")
+        self.assertEqual(created.id, report["results"][5]["id"])
+        self.assertTrue(created.verify_password("pw"))
+        self.assertEqual(User.query.count(), 4)
+
+    def test_bulk_ndjson(self):
+        """
+        Test that an NDJSON body is read line by line and a broken line is reported, not fatal.
+        """
+        body = "\n".join([json.dumps(self._row("n1@example.com")), "{broken", "",
+                          json.dumps(self._row("n2@example.com"))])
+        response = self._post(body, content_type="application/x-ndjson")
+        self.assertEqual([r["status"] for r in response.get_json()["results"]], ["created", "invalid", "created"])
+
+    def test_bulk_conflict_during_insert(self):
+        """
+        Test that an email registered after the dedup query is reported as exists without losing the batch.
+        """
+        facade.create_user({"first_name": "Late", "last_name": "User",
+                            "email": "late@example.com", "password": "pw"})
+        facade.user_repository.existing_emails = lambda emails: set()
+        try:
+            response = self._post(json.dumps([self._row("late@example.com"), self._row("ok@example.com")]))
+        finally:
+            del facade.user_repository.existing_emails
+        self.assertEqual([r["status"] for r in response.get_json()["results"]], ["exists", "created"])
+        self.assertIsNotNone(facade.get_user_by_email("ok@example.com"))
+
+    def test_bulk_rejections(self):
+        """
+        Test that non-admins, malformed bodies and oversized imports are rejected.
+        """
+        self.assertEqual(self._post("[]", token=self.user_token).status_code, 403)
+        self.assertEqual(self._post("{}").status_code, 400)
+        self.assertEqual(self._post("nope").status_code, 400)
+        self.app.config["BULK_IMPORT_MAX_ROWS"] = 1
+        self.assertEqual(self._post(json.dumps([self._row("x@example.com")] * 2)).status_code, 413)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import time
+import unittest
+from datetime import timedelta
+from flask_jwt_extended import create_access_token, verify_jwt_in_request
+from app import create_app, db, hasher, jwt
+from app.api.v1.principal import current_principal
+from app.services import facade
+
+
+class TokenTestCase(unittest.TestCase):
+    """
+    This test case verifies token handling: login issues both tokens,
+    /refresh trades one for an access token, verified claims are cached
+    and the request principal is resolved once.
+    """
+
+    def setUp(self):
+        """
+        Set up a test application context and an in-memory database,
+        then create a user and log in once.
+        """
+        self.app = create_app("config.TestConfig")
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.user = facade.create_user({"first_name": "Token", "last_name": "User",
+                                        "email": "token@example.com", "password": "secret"})
+        self.client = self.app.test_client()
+        self.base_url = "/api/v1/auth"
+        response = self.client.post(f"{self.base_url}/login",
+                                    json={"email": "token@example.com", "password": "secret"})
+        self.tokens = response.get_json()
+
+    def tearDown(self):
+        """
+        Remove the session and drop all tables after each test.
+        """
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _bearer(self, token):
+        return {"Authorization": f"Bearer {token}"}
+
+    def test_login_issues_refresh_token(self):
+        """
+        Test that login returns an access token and a refresh token.
+        """
+        self.assertIn("access_token", self.tokens)
+        self.assertIn("refresh_token", self.tokens)
+
+    def test_refresh_issues_access_token_without_bcrypt(self):
+        """
+        Test that /refresh returns a working access token without verifying the password.
+        """
+        hashed = hasher.stats()["completed"]
+        response = self.client.post(f"{self.base_url}/refresh", headers=self._bearer(self.tokens["refresh_token"]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(hasher.stats()["completed"], hashed)
+
+        access_token = response.get_json()["access_token"]
+        protected = self.client.get(f"{self.base_url}/protected", headers=self._bearer(access_token))
+        self.assertEqual(protected.status_code, 200)
+
+    def test_refresh_rejects_access_token(self):
+        """
+        Test that an access token cannot be used as a refresh token, nor the other way round.
+        """
+        response = self.client.post(f"{self.base_url}/refresh", headers=self._bearer(self.tokens["access_token"]))
+        self.assertEqual(response.status_code, 422)
+        response = self.client.get(f"{self.base_url}/protected", headers=self._bearer(self.tokens["refresh_token"]))
+        self.assertEqual(response.status_code, 422)
+
+    def test_claims_cache_reuses_decoded_token(self):
+        """
+        Test that a token seen again is served from the claims cache.
+        """
+        headers = self._bearer(self.tokens["access_token"])
+        hits = jwt.claims_cache.stats()["hits"]
+        for _ in range(3):
+            self.assertEqual(self.client.get(f"{self.base_url}/protected", headers=headers).status_code, 200)
+        self.assertEqual(jwt.claims_cache.stats()["hits"], hits + 2)
+
+    def test_claims_cache_never_outlives_token(self):
+        """
+        Test that a cached token is still rejected once it expires.
+        """
+        token = create_access_token(identity={"id": self.user.id, "is_admin": False},
+                                    expires_delta=timedelta(seconds=1))
+        url = f"{self.base_url}/protected"
+        self.assertEqual(self.client.get(url, headers=self._bearer(token)).status_code, 200)
+        time.sleep(1.1)
+        self.assertEqual(self.client.get(url, headers=self._bearer(token)).status_code, 401)
+
+    def test_principal_is_resolved_once_per_request(self):
+        """
+        Test that the principal and its User row are built once per request.
+        """
+        with self.app.test_request_context(headers=self._bearer(self.tokens["access_token"])):
+            verify_jwt_in_request()
+            principal = current_principal()
+            self.assertIs(current_principal(), principal)
+            self.assertEqual(principal.user.id, self.user.id)
+            self.assertIs(principal.user, principal.user)
+            self.assertTrue(principal.may_act_for(self.user.id))
+            self.assertFalse(principal.may_act_for("someone-else"))
+
+
+if __name__ == "__main__":
+    unittest.main()
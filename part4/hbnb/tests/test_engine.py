@@ -0,0 +1,132 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+import config
+from app import create_app, db
+from app.engine import pool_stats
+
+
+def file_config(path, **settings):
+    """TestConfig pointing at a SQLite file, with `settings` overriding the class attributes"""
+    return type('FileConfig', (config.TestConfig,), dict(SQLALCHEMY_DATABASE_URI=f'sqlite:///{path}', **settings))
+
+
+class TestSQLitePragmas(unittest.TestCase):
+    """
+    This test case verifies that the SQLite tuning profile is applied
+    to every connection of a file-backed database, and only when enabled.
+    """
+
+    def setUp(self):
+        """
+        Create a scratch directory for the database files.
+        """
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """
+        Remove the scratch directory.
+        """
+        shutil.rmtree(self.tmpdir)
+
+    def _pragmas(self, config_class):
+        app = create_app(config_class)
+        with app.app_context():
+            with db.engine.connect() as connection:
+                values = {name: connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+                          for name in ('journal_mode', 'synchronous', 'busy_timeout', 'temp_store')}
+            db.engine.dispose()
+        return values
+
+    def test_profile_applied_on_connect(self):
+        """
+        Test that WAL, synchronous=NORMAL, the busy timeout and in-memory temp storage are set.
+        """
+        values = self._pragmas(file_config(os.path.join(self.tmpdir, 'tuned.db'), SQLITE_BUSY_TIMEOUT=1234))
+        self.assertEqual(values, {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 1234, 'temp_store': 2})
+
+    def test_profile_disabled(self):
+        """
+        Test that turning tuning off leaves SQLite's own defaults.
+        """
+        values = self._pragmas(file_config(os.path.join(self.tmpdir, 'plain.db'), SQLITE_TUNING=False))
+        self.assertEqual(values['journal_mode'], 'delete')
+        self.assertEqual(values['synchronous'], 2)
+
+
+class TestConnectionPool(unittest.TestCase):
+    """
+    This test case verifies the environment-driven engine options and
+    the pool statistics, using a file-backed SQLite pool.
+    """
+
+    def setUp(self):
+        """
+        Create an app on a SQLite file with a one-connection pool and no overflow.
+        """
+        self.tmpdir = tempfile.mkdtemp()
+        options = {'pool_size': 1, 'max_overflow': 0, 'pool_timeout': 1}
+        self.app = create_app(file_config(os.path.join(self.tmpdir, 'pool.db'), SQLALCHEMY_ENGINE_OPTIONS=options))
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        """
+        Dispose of the engine and remove the scratch directory.
+        """
+        db.session.remove()
+        db.engine.dispose()
+        self.app_context.pop()
+        shutil.rmtree(self.tmpdir)
+
+    def test_pool_stats(self):
+        """
+        Test that checked-out connections, waits and timeouts are reported.
+        """
+        with db.engine.connect():
+            stats = pool_stats(db.engine)
+            self.assertEqual(stats['pool'], 'MonitoredQueuePool')
+            self.assertEqual((stats['size'], stats['checked_out'], stats['overflow']), (1, 1, 0))
+            with self.assertRaises(PoolTimeout):
+                db.engine.connect()
+        stats = pool_stats(db.engine)
+        self.assertEqual(stats['checked_out'], 0)
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertGreaterEqual(stats['max_wait_ms'], 900)
+
+    def test_memory_database_keeps_static_pool(self):
+        """
+        Test that the in-memory test database is not given a queue pool.
+        """
+        app = create_app("config.TestConfig")
+        with app.app_context():
+            self.assertEqual(pool_stats(db.engine), {'pool': 'StaticPool'})
+
+    def test_engine_options_from_env(self):
+        """
+        Test that the production engine options follow the DB_* environment variables.
+        """
+        env = {'DB_POOL_SIZE': '3', 'DB_POOL_MAX_OVERFLOW': '1', 'DB_POOL_RECYCLE': '60',
+               'DB_POOL_PRE_PING': 'false', 'DB_STATEMENT_TIMEOUT_MS': '2500'}
+        with mock.patch.dict(os.environ, env):
+            options = config.engine_options_from_env('postgresql://db/hbnb')
+            self.assertEqual(config.engine_options_from_env('sqlite:///hbnb.db').get('connect_args'), None)
+        self.assertEqual((options['pool_size'], options['max_overflow'], options['pool_recycle']), (3, 1, 60))
+        self.assertFalse(options['pool_pre_ping'])
+        self.assertEqual(options['connect_args'], {'options': '-c statement_timeout=2500'})
+
+    def test_config_selected_from_env(self):
+        """
+        Test that create_app() without a class takes the configuration named by APP_CONFIG.
+        """
+        with mock.patch.dict(os.environ, {'APP_CONFIG': 'testing'}):
+            app = create_app()
+        self.assertTrue(app.config['TESTING'])
+        self.assertEqual(app.config['SQLALCHEMY_DATABASE_URI'], config.TestConfig.SQLALCHEMY_DATABASE_URI)
+
+
+if __name__ == "__main__":
+    unittest.main()
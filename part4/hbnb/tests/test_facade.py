@@ -1,10 +1,29 @@
 import unittest
+from contextlib import contextmanager
+from sqlalchemy import event
 from app import create_app, db
+from app.persistence.repository import unit_of_work
 from app.services.facade import HBnBFacade
 from app.models.user import User
 from app.models.amenity import Amenity
 from app.models.place import Place
 from app.models.review import Review
+from tests.test_places_api import count_queries
+
+@contextmanager
+def count_commits():
+    """Collect one entry per transaction committed on the engine inside the block"""
+    commits = []
+
+    def on_commit(conn):
+        commits.append(conn)
+
+    event.listen(db.engine, "commit", on_commit)
+    try:
+        yield commits
+    finally:
+        event.remove(db.engine, "commit", on_commit)
+
 
 class TestHBnBFacade(unittest.TestCase):
     """
@@ -95,6 +114,37 @@ class TestHBnBFacade(unittest.TestCase):
         self.assertTrue(result)
         self.assertIsNone(self.facade.get_user(user.id))
 
+    def test_email_is_normalized_and_unique(self):
+        """
+        Test that emails are stored lowercase, looked up case-insensitively and unique across case.
+        """
+        user = self.facade.create_user({"first_name": "Case", "last_name": "User",
+                                        "email": " Case@Example.COM ", "password": "pw"})
+        self.assertEqual(user.email, "case@example.com")
+        self.assertEqual(self.facade.get_user_by_email("CASE@example.com").id, user.id)
+        with self.assertRaises(ValueError):
+            self.facade.create_user({"first_name": "Other", "last_name": "User",
+                                     "email": "case@EXAMPLE.com", "password": "pw"})
+        # The failed insert was rolled back; the session is usable again
+        self.assertEqual(len(self.facade.get_all_users()), 1)
+
+        plan = db.session.execute(db.text(
+            "EXPLAIN QUERY PLAN SELECT * FROM users WHERE email = 'case@example.com'")).fetchall()
+        self.assertIn("USING INDEX", " ".join(row[-1] for row in plan))
+
+    def test_update_user_email_conflict(self):
+        """
+        Test that moving a user onto a taken email is rejected by the unique index.
+        """
+        self.facade.create_user({"first_name": "A", "last_name": "User",
+                                 "email": "a@example.com", "password": "pw"})
+        b = self.facade.create_user({"first_name": "B", "last_name": "User",
+                                     "email": "b@example.com", "password": "pw"})
+        with self.assertRaises(ValueError):
+            self.facade.update_user(b.id, {"email": "A@example.com"})
+        self.assertEqual(self.facade.get_user_by_id(b.id).email, "b@example.com")
+        self.assertIsNone(self.facade.update_user("missing", {"first_name": "X"}))
+
     # ------------------ AMENITY TESTS ------------------
 
     def test_create_amenity_success(self):
@@ -368,6 +418,145 @@ class TestHBnBFacade(unittest.TestCase):
         result = self.facade.delete_review(review.id)
         self.assertTrue(result)
         self.assertIsNone(self.facade.get_review(review.id))
+    def test_get_many_amenities_keeps_input_order(self):
+        """
+        Test that get_many returns objects in input order and reports every missing id.
+        """
+        wifi = self.facade.create_amenity({"name": "Wifi"})
+        pool = self.facade.create_amenity({"name": "Pool"})
+        found, missing = self.facade.amenity_repository.get_many([pool.id, "nope-1", wifi.id, "nope-2"])
+        self.assertEqual([a.id for a in found], [pool.id, wifi.id])
+        self.assertEqual(missing, ["nope-1", "nope-2"])
+
+    def test_create_place_reports_all_missing_amenities(self):
+        """
+        Test that create_place names every unknown amenity in a single error.
+        """
+        owner = self.facade.create_user({
+            "first_name": "Amenity",
+            "last_name": "Owner",
+            "email": "amenityowner@example.com",
+            "password": "pass"
+        })
+        wifi = self.facade.create_amenity({"name": "Wifi"})
+        place_data = {
+            "title": "Equipped",
+            "price": 50,
+            "latitude": 45.0,
+            "longitude": 10.0,
+            "owner_id": owner.id,
+            "amenities": ["nope-1", wifi.id, "nope-2"]
+        }
+        with self.assertRaises(ValueError) as error:
+            self.facade.create_place(place_data)
+        self.assertIn("nope-1, nope-2", str(error.exception))
+
+        place_data["amenities"] = [wifi.id, wifi.id]
+        place = self.facade.create_place(place_data)
+        self.assertEqual([a.id for a in place.amenities], [wifi.id])
+
+    # ------------------ RATING AGGREGATE TESTS ------------------
+
+    def _place_with_reviewer(self):
+        owner = self.facade.create_user({
+            "first_name": "Rated",
+            "last_name": "Owner",
+            "email": "rated@example.com",
+            "password": "ratedpass"
+        })
+        place = self.facade.create_place({
+            "title": "Rated Place",
+            "description": "desc",
+            "price": 50,
+            "latitude": 45.0,
+            "longitude": 10.0,
+            "owner_id": owner.id
+        })
+        return owner, place
+
+    def test_rating_aggregates_follow_review_writes(self):
+        """
+        Test that creating, updating and deleting reviews keeps review_count and average_rating exact.
+        """
+        user, place = self._place_with_reviewer()
+        self.assertEqual(place.review_count, 0)
+        self.assertIsNone(place.average_rating)
+
+        first = self.facade.create_review({"text": "Good", "rating": 4, "user_id": user.id, "place_id": place.id})
+        self.facade.create_review({"text": "Great", "rating": 5, "user_id": user.id, "place_id": place.id})
+        db.session.refresh(place)
+        self.assertEqual(place.review_count, 2)
+        self.assertEqual(place.average_rating, 4.5)
+
+        self.facade.update_review(first.id, {"rating": 2})
+        db.session.refresh(place)
+        self.assertEqual(place.average_rating, 3.5)
+
+        with self.assertRaises(ValueError):
+            self.facade.update_review(first.id, {"rating": 9})
+        db.session.rollback()
+
+        self.facade.delete_review(first.id)
+        db.session.refresh(place)
+        self.assertEqual(place.review_count, 1)
+        self.assertEqual(place.rating_sum, 5)
+
+    def test_rebuild_rating_aggregates(self):
+        """
+        Test that rebuilding the aggregates repairs counters that drifted from the reviews table.
+        """
+        user, place = self._place_with_reviewer()
+        self.facade.create_review({"text": "Fine", "rating": 3, "user_id": user.id, "place_id": place.id})
+        place.review_count = 7
+        place.rating_sum = 1
+        db.session.commit()
+
+        self.assertEqual(self.facade.rebuild_rating_aggregates(), 1)
+        db.session.refresh(place)
+        self.assertEqual(place.review_count, 1)
+        self.assertEqual(place.rating_sum, 3)
+
+    def test_writes_commit_once(self):
+        """
+        Test that each facade write spanning several repositories commits exactly once.
+        """
+        user, place = self._place_with_reviewer()
+        with count_commits() as commits:
+            review = self.facade.create_review({"text": "Good", "rating": 4, "user_id": user.id, "place_id": place.id})
+        self.assertEqual(len(commits), 1)
+        with count_commits() as commits:
+            self.facade.update_place(place.id, {"latitude": 10.0, "longitude": 20.0})
+        self.assertEqual(len(commits), 1)
+        with count_commits() as commits:
+            self.facade.delete_review(review.id)
+        self.assertEqual(len(commits), 1)
+        db.session.refresh(place)
+        self.assertEqual(place.review_count, 0)
+
+    def test_created_review_stays_loaded(self):
+        """
+        Test that the review returned by create_review is readable without reloading it.
+        """
+        user, place = self._place_with_reviewer()
+        review = self.facade.create_review({"text": "Good", "rating": 4, "user_id": user.id, "place_id": place.id})
+        with count_queries() as statements:
+            self.assertEqual((review.text, review.rating, review.user_id, review.place_id),
+                             ("Good", 4, user.id, place.id))
+        self.assertEqual(statements, [])
+        self.assertEqual(place.review_count, 1)
+
+    def test_unit_of_work_rolls_back_every_step(self):
+        """
+        Test that a failure inside a unit of work discards the writes already flushed in it.
+        """
+        user, place = self._place_with_reviewer()
+        with self.assertRaises(RuntimeError):
+            with unit_of_work():
+                self.facade.create_review({"text": "Good", "rating": 4, "user_id": user.id, "place_id": place.id})
+                raise RuntimeError("boom")
+        self.assertEqual(Review.query.count(), 0)
+        db.session.refresh(place)
+        self.assertEqual(place.review_count, 0)
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,171 @@
+import threading
+import unittest
+from flask_jwt_extended import create_access_token
+from app import create_app, db, bcrypt, hasher, HashingBusy
+from app.hashing import hash_rounds
+from app.services import facade
+
+
+class TestPasswordHasher(unittest.TestCase):
+    """
+    This test case verifies the bounded password hashing pool:
+    hashing off the request thread, the queue limit, and the 503 answer
+    of the login endpoint when the pool is saturated.
+    """
+
+    def setUp(self):
+        """
+        Set up a test application with a one-thread pool and no queue.
+        """
+        self.app = create_app("config.TestConfig")
+        self.app.config.update(HASH_WORKERS=1, HASH_QUEUE_LIMIT=0)
+        hasher.init_app(self.app)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        """
+        Remove the session and drop all tables after each test.
+        """
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _occupy_pool(self):
+        """Block the only worker until the returned event is set"""
+        release = threading.Event()
+        started = threading.Event()
+
+        def work():
+            started.set()
+            release.wait(5)
+
+        thread = threading.Thread(target=hasher.run, args=(work,))
+        thread.start()
+        started.wait(5)
+        return release, thread
+
+    def test_hash_runs_on_pool(self):
+        """
+        Test that hashing and verification run on the pool threads and are counted.
+        """
+        names = []
+        hasher.run(lambda: names.append(threading.current_thread().name))
+        self.assertTrue(names[0].startswith("bcrypt"))
+
+        pw_hash = hasher.hash("secret")
+        self.assertTrue(hasher.verify(pw_hash, "secret"))
+        self.assertFalse(hasher.verify(pw_hash, "wrong"))
+        stats = hasher.stats()
+        self.assertEqual(stats["completed"], 4)
+        self.assertEqual(stats["pending"], 0)
+
+    def test_saturated_pool_rejects(self):
+        """
+        Test that a call beyond workers + queue limit fails fast and is counted.
+        """
+        release, thread = self._occupy_pool()
+        try:
+            with self.assertRaises(HashingBusy):
+                hasher.hash("secret")
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(hasher.stats()["rejected"], 1)
+        self.assertTrue(hasher.verify(hasher.hash("secret"), "secret"))
+
+    def test_login_answers_503_when_saturated(self):
+        """
+        Test that the login endpoint answers 503 with Retry-After while the pool is full.
+        """
+        facade.create_user({"first_name": "Busy", "last_name": "User",
+                            "email": "busy@example.com", "password": "secret"})
+        release, thread = self._occupy_pool()
+        try:
+            response = self.client.post("/api/v1/auth/login",
+                                        json={"email": "busy@example.com", "password": "secret"})
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "1")
+
+    def test_password_updates_answer_503_when_saturated(self):
+        """
+        Test that the user and admin update endpoints answer 503 with Retry-After while the pool is full.
+        """
+        user = facade.create_user({"first_name": "Busy", "last_name": "User",
+                                   "email": "busy@example.com", "password": "secret", "is_admin": True})
+        headers = {"Authorization": f"Bearer {create_access_token(identity={'id': user.id, 'is_admin': True})}"}
+        body = {"first_name": "Busy", "last_name": "User", "email": "busy@example.com", "password": "other"}
+        release, thread = self._occupy_pool()
+        try:
+            responses = [self.client.put(f"/api/v1/users/{user.id}", json=body, headers=headers),
+                         self.client.put(f"/api/v1/admin/users/{user.id}", json=body, headers=headers)]
+        finally:
+            release.set()
+            thread.join()
+        for response in responses:
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers["Retry-After"], "1")
+
+    def test_registration_hashes_once(self):
+        """
+        Test that registering through the API costs exactly one bcrypt hash.
+        """
+        response = self.client.post("/api/v1/users/", json={
+            "first_name": "New", "last_name": "User",
+            "email": "new@example.com", "password": "secret"})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(hasher.stats()["completed"], 1)
+        self.assertTrue(facade.get_user_by_email("new@example.com").verify_password("secret"))
+
+    def test_login_rehashes_stale_hash(self):
+        """
+        Test that logging in with a hash of a lower cost rehashes it in the background, and never downgrades one.
+        """
+        self.app.config["BCRYPT_LOG_ROUNDS"] = 4
+        bcrypt.init_app(self.app)
+        hasher.init_app(self.app)
+        user = facade.create_user({"first_name": "Old", "last_name": "Hash",
+                                   "email": "old@example.com", "password": "secret"})
+        self.assertEqual(hash_rounds(user.password), 4)
+
+        self.app.config.update(BCRYPT_LOG_ROUNDS=5, HASH_QUEUE_LIMIT=1)
+        bcrypt.init_app(self.app)
+        hasher.init_app(self.app)
+        response = self.client.post("/api/v1/auth/login",
+                                    json={"email": "old@example.com", "password": "secret"})
+        self.assertEqual(response.status_code, 200)
+        hasher.run(lambda: None)  # the single worker runs tasks in order
+
+        db.session.expire_all()
+        user = facade.get_user_by_email("old@example.com")
+        self.assertEqual(hash_rounds(user.password), 5)
+        self.assertTrue(user.verify_password("secret"))
+        self.assertEqual(hasher.stats()["rehashed"], 1)
+
+        self.app.config["BCRYPT_LOG_ROUNDS"] = 4
+        bcrypt.init_app(self.app)
+        hasher.init_app(self.app)
+        self.assertFalse(hasher.needs_rehash(user.password))
+        self.assertEqual(self.client.post("/api/v1/auth/login",
+                                          json={"email": "old@example.com", "password": "secret"}).status_code, 200)
+        hasher.run(lambda: None)
+        db.session.expire_all()
+        self.assertEqual(hash_rounds(facade.get_user_by_email("old@example.com").password), 5)
+
+    def test_calibrate(self):
+        """
+        Test that calibration stays within its bounds and grows with the time budget.
+        """
+        self.assertEqual(hasher.calibrate(0, min_rounds=4), 4)
+        self.assertEqual(hasher.calibrate(10 ** 9, min_rounds=4, max_rounds=6), 6)
+        self.assertEqual(hash_rounds("$2b$07$abcdefghijklmnopqrstuv"), 7)
+        self.assertIsNone(hash_rounds("plain"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import subprocess
+import sys
+import textwrap
+import unittest
+import uuid
+from sqlalchemy import Column, MetaData, String, Table, create_engine, select, text
+from app.models.ids import CompactID, uuid7
+
+HBNB_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestIds(unittest.TestCase):
+    """
+    This test case verifies the time-ordered UUIDv7 generator and the
+    CompactID column type that stores string ids as 16 bytes.
+    """
+
+    def setUp(self):
+        """
+        Create an in-memory table keyed by a compact id.
+        """
+        self.engine = create_engine("sqlite://")
+        self.things = Table("things", MetaData(),
+                            Column("id", CompactID(compact=True), primary_key=True),
+                            Column("name", String(20)))
+        self.things.create(self.engine)
+
+    def tearDown(self):
+        """
+        Dispose of the engine.
+        """
+        self.engine.dispose()
+
+    def test_uuid7_layout_and_order(self):
+        """
+        Test that UUIDv7 values carry version 7 and the RFC variant and sort in creation order.
+        """
+        ids = [uuid7() for _ in range(2000)]
+        self.assertTrue(all(value.version == 7 and value.variant == uuid.RFC_4122 for value in ids))
+        self.assertEqual(sorted(ids), ids)
+        self.assertEqual(sorted(map(str, ids)), list(map(str, ids)))
+        self.assertEqual(len(set(ids)), len(ids))
+
+    def test_compact_id_round_trip(self):
+        """
+        Test that ids are stored as 16-byte blobs, read back as strings and sorted like the strings.
+        """
+        ids = [str(uuid.uuid4()) for _ in range(50)]
+        with self.engine.begin() as connection:
+            connection.execute(self.things.insert(), [{"id": value, "name": "x"} for value in ids])
+            stored = connection.execute(text("SELECT DISTINCT typeof(id), length(id) FROM things")).all()
+            self.assertEqual([tuple(row) for row in stored], [("blob", 16)])
+            ordered = connection.execute(select(self.things.c.id).order_by(self.things.c.id)).scalars().all()
+            self.assertEqual(ordered, sorted(ids))
+            found = connection.execute(select(self.things.c.name).where(self.things.c.id == ids[7])).scalar()
+            self.assertEqual(found, "x")
+            missing = connection.execute(select(self.things.c.name).where(self.things.c.id == "missing")).scalar()
+            self.assertIsNone(missing)
+
+    def test_app_with_uuid7_strategy(self):
+        """
+        Test that with ID_STRATEGY=uuid7 the models store binary keys and the facade still speaks strings.
+        """
+        script = textwrap.dedent("""
+            from sqlalchemy import text
+            from app import create_app, db
+            from app.services import facade
+            app = create_app("config.TestConfig")
+            with app.app_context():
+                owner = facade.create_user({"first_name": "A", "last_name": "B",
+                                            "email": "a@example.com", "password": "pw"})
+                place = facade.create_place({"title": "Loft", "price": 10, "latitude": 1.0,
+                                             "longitude": 2.0, "owner_id": owner.id})
+                owner_id, place_id = owner.id, place.id
+                facade.create_review({"text": "Good", "rating": 5, "user_id": owner_id, "place_id": place_id})
+                db.session.expunge_all()
+                found = facade.get_place(place_id)
+                assert found.owner.id == owner_id and found.reviews[0].user_id == owner_id
+                assert facade.get_places_page(10, filters={"bbox": (0, 0, 3, 3)})[0][0].id == place_id
+                kinds = db.session.execute(text("SELECT typeof(id), typeof(owner_id) FROM places")).one()
+                assert tuple(kinds) == ("blob", "blob"), kinds
+                assert place_id < facade.create_user({"first_name": "C", "last_name": "D",
+                                                      "email": "c@example.com", "password": "pw"}).id
+            print("ok")
+        """)
+        result = subprocess.run([sys.executable, "-c", script], cwd=HBNB_ROOT, capture_output=True, text=True,
+                                env=dict(os.environ, ID_STRATEGY="uuid7"))
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("ok", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,227 @@
+import os
+import re
+import shutil
+import tempfile
+import unittest
+from sqlalchemy import Integer, MetaData, create_engine, event, inspect, text
+from app import create_app, db
+from app.models.ids import ID_STRATEGY
+from app.persistence.migrations import MIGRATIONS, current_version, upgrade
+from app.services import facade
+from tests.test_engine import file_config
+
+HBNB_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@unittest.skipIf(ID_STRATEGY == "uuid7", "databases with the old schema store ids as strings")
+class TestMigrations(unittest.TestCase):
+    """
+    This test case verifies the versioned migrations on a database
+    created with the old schema: Integer review keys, no foreign key indexes
+    and no rating aggregate columns on places.
+    """
+
+    def setUp(self):
+        """
+        Build the old schema in a SQLite file and add a place with one review whose keys are UUID strings.
+        """
+        self.tmpdir = tempfile.mkdtemp()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmpdir, 'old.db')}")
+        old = MetaData()
+        for table in db.metadata.sorted_tables:
+            table.to_metadata(old).indexes.clear()
+        old.tables['reviews'].c.user_id.type = Integer()
+        old.tables['reviews'].c.place_id.type = Integer()
+        old.create_all(self.engine)
+        with self.engine.begin() as connection:
+            connection.execute(text("ALTER TABLE places DROP COLUMN review_count"))
+            connection.execute(text("ALTER TABLE places DROP COLUMN rating_sum"))
+            connection.execute(text(
+                "INSERT INTO places (id, title, price, latitude, longitude, owner_id, created_at, updated_at) "
+                "VALUES ('6f1c2b8e-0000-4000-8000-000000000002', 'Loft', 10, 1.0, 2.0, "
+                "'6f1c2b8e-0000-4000-8000-000000000001', '2024-01-01', '2024-01-01')"))
+            connection.execute(text(
+                "INSERT INTO reviews (id, text, rating, user_id, place_id, created_at, updated_at) "
+                "VALUES ('r1', 'Good', 4, '6f1c2b8e-0000-4000-8000-000000000001', "
+                "'6f1c2b8e-0000-4000-8000-000000000002', '2024-01-01', '2024-01-01')"))
+
+    def tearDown(self):
+        """
+        Dispose of the engine and remove the scratch directory.
+        """
+        self.engine.dispose()
+        shutil.rmtree(self.tmpdir)
+
+    def test_upgrade_fixes_types_and_adds_indexes(self):
+        """
+        Test that the upgrade retypes the review keys, keeps the data, adds the indexes,
+        fills the rating aggregates, loads the R*Tree and records its version.
+        """
+        self.assertEqual(upgrade(self.engine), [version for version, _, _ in MIGRATIONS])
+        inspector = inspect(self.engine)
+        columns = {c['name']: c['type'] for c in inspector.get_columns('reviews')}
+        self.assertNotIsInstance(columns['user_id'], Integer)
+        self.assertNotIsInstance(columns['place_id'], Integer)
+        indexed = {(table, tuple(index['column_names'])[0])
+                   for table in ('reviews', 'places', 'amenities', 'place_amenity')
+                   for index in inspector.get_indexes(table)}
+        for expected in (('reviews', 'user_id'), ('reviews', 'place_id'), ('places', 'owner_id'),
+                         ('amenities', 'owner_id'), ('place_amenity', 'amenity_id')):
+            self.assertIn(expected, indexed)
+
+        with self.engine.connect() as connection:
+            row = connection.execute(text("SELECT user_id, typeof(user_id) FROM reviews WHERE id = 'r1'")).one()
+            self.assertEqual(tuple(row), ('6f1c2b8e-0000-4000-8000-000000000001', 'text'))
+            aggregates = connection.execute(text("SELECT review_count, rating_sum FROM places")).one()
+            self.assertEqual(tuple(aggregates), (1, 4))
+            located = connection.execute(text("SELECT min_lat, min_lng FROM places_rtree")).all()
+            self.assertEqual([tuple(row) for row in located], [(1.0, 2.0)])
+            self.assertEqual(current_version(connection), MIGRATIONS[-1][0])
+        self.assertEqual(upgrade(self.engine), [])
+
+    def test_upgrade_lowercases_emails(self):
+        """
+        Test that stored emails are lowercased, except case variants of one address, which are reported.
+        """
+        with self.engine.begin() as connection:
+            for user_id, email in (("u1", " Mixed@Example.com"), ("u2", "dup@example.com"), ("u3", "DUP@example.com")):
+                connection.execute(text(
+                    "INSERT INTO users (id, first_name, last_name, email, password, created_at, updated_at) "
+                    "VALUES (:id, 'A', 'B', :email, 'x', '2024-01-01', '2024-01-01')"), {"id": user_id, "email": email})
+        with self.assertWarnsRegex(UserWarning, "dup@example.com, DUP@example.com"):
+            upgrade(self.engine)
+        with self.engine.connect() as connection:
+            emails = dict(connection.execute(text("SELECT id, email FROM users")).all())
+        self.assertEqual(emails, {"u1": "mixed@example.com", "u2": "dup@example.com", "u3": "DUP@example.com"})
+
+
+@unittest.skipIf(ID_STRATEGY == "uuid7", "databases with the old schema store ids as strings")
+class TestUpgradeBaselineDatabase(unittest.TestCase):
+    """
+    This test case starts the application on a copy of the committed
+    development database, whose tables predate every migration.
+    """
+
+    def setUp(self):
+        """
+        Copy the development database and add a user, a place and a review with the old schema.
+        """
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "development.db")
+        shutil.copy(os.path.join(HBNB_ROOT, "instance", "development.db"), self.path)
+        engine = create_engine(f"sqlite:///{self.path}")
+        with engine.begin() as connection:
+            connection.execute(text(
+                "INSERT INTO users (id, first_name, last_name, email, password, is_admin, created_at, updated_at) "
+                "VALUES ('6f1c2b8e-0000-4000-8000-000000000001', 'Old', 'Owner', 'old@example.com', 'x', 0, "
+                "'2024-01-01', '2024-01-01')"))
+            connection.execute(text(
+                "INSERT INTO places (id, title, price, latitude, longitude, owner_id, created_at, updated_at) "
+                "VALUES ('6f1c2b8e-0000-4000-8000-000000000002', 'Loft', 10, 1.0, 2.0, "
+                "'6f1c2b8e-0000-4000-8000-000000000001', '2024-01-01', '2024-01-01')"))
+            connection.execute(text(
+                "INSERT INTO reviews (id, text, rating, user_id, place_id, created_at, updated_at) "
+                "VALUES ('r1', 'Good', 4, '6f1c2b8e-0000-4000-8000-000000000001', "
+                "'6f1c2b8e-0000-4000-8000-000000000002', '2024-01-01', '2024-01-01')"))
+        engine.dispose()
+        self.app = create_app(file_config(self.path))
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        """
+        Dispose of the application's engines and remove the scratch directory.
+        """
+        with self.app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+        shutil.rmtree(self.tmpdir)
+
+    def test_places_endpoints_after_upgrade(self):
+        """
+        Test that the place list and the bounding-box search work on the upgraded database.
+        """
+        response = self.client.get("/api/v1/places/")
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        self.assertEqual([place["title"] for place in response.get_json()], ["Loft"])
+
+        response = self.client.get("/api/v1/places/search?bbox=-10,-10,10,10")
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        self.assertEqual([place["title"] for place in response.get_json()], ["Loft"])
+
+        with self.app.app_context():
+            self.assertEqual(facade.get_place("6f1c2b8e-0000-4000-8000-000000000002").review_count, 1)
+
+
+def table_scans(connection, statement, parameters):
+    """Plan lines of `statement` that read a whole table or sort in a temporary B-tree"""
+    plan = [row[3] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+    return [line for line in plan if re.fullmatch(r"SCAN \w+", line) or "TEMP B-TREE" in line]
+
+
+class TestQueryPlans(unittest.TestCase):
+    """
+    This test case runs the hot facade reads and writes and checks with
+    EXPLAIN QUERY PLAN that every statement they send is served by an index.
+    """
+
+    def setUp(self):
+        """
+        Set up a test application with an owner, an amenity, three places and a review.
+        """
+        self.app = create_app("config.TestConfig")
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        owner = facade.create_user({"first_name": "Plan", "last_name": "Owner",
+                                    "email": "plan@example.com", "password": "pw"})
+        amenity = facade.create_amenity({"name": "Wifi"})
+        places = [facade.create_place({"title": f"Place {i}", "price": 10 + i, "latitude": 1.0 + i,
+                                       "longitude": 2.0, "owner_id": owner.id, "amenities": [amenity.id]})
+                  for i in range(3)]
+        review = facade.create_review({"text": "Good", "rating": 4, "user_id": owner.id, "place_id": places[0].id})
+        self.owner_id, self.amenity_id, self.review_id = owner.id, amenity.id, review.id
+        self.place_id = places[0].id
+        db.session.expunge_all()
+
+    def tearDown(self):
+        """
+        Remove the session and drop all tables after each test.
+        """
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_facade_queries_use_indexes(self):
+        """
+        Test that no statement of the hot facade calls scans a table or sorts without an index.
+        """
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if not executemany and statement.lstrip().split()[0] in ("SELECT", "UPDATE", "DELETE"):
+                statements.append((statement, parameters))
+
+        event.listen(db.engine, "before_cursor_execute", capture)
+        try:
+            facade.get_place(self.place_id)
+            facade.get_reviews_by_place(self.place_id)
+            facade.get_reviews_by_place(self.place_id, sort="rating")
+            facade.get_places_page(2)
+            facade.get_user_by_email("plan@example.com")
+            list(facade.get_user_by_id(self.owner_id).reviews)
+            facade.update_user(self.owner_id, {"first_name": "Renamed"})
+            facade.update_amenity(self.amenity_id, {"name": "Fast wifi"})
+            facade.update_review(self.review_id, {"text": "Very good"})
+        finally:
+            event.remove(db.engine, "before_cursor_execute", capture)
+
+        self.assertGreater(len(statements), 10)
+        with db.engine.connect() as connection:
+            for statement, parameters in statements:
+                self.assertEqual(table_scans(connection, statement, parameters), [], statement)
+
+
+if __name__ == "__main__":
+    unittest.main()
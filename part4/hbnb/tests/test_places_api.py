@@ -0,0 +1,426 @@
+import json
+import unittest
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from sqlalchemy import event, text
+from app import create_app, db
+from app.api.v1.pagination import MAX_PAGE_LIMIT
+from app.services import facade
+
+
+@contextmanager
+def count_queries():
+    """Collect every SQL statement sent to the engine inside the block"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+
+class PlacesListAPITestCase(unittest.TestCase):
+    """
+    This test case verifies the listing endpoints of the Place API:
+    keyset pagination and the Link header pointing at the next page.
+    """
+
+    def setUp(self):
+        """
+        Set up a test application context and an in-memory database,
+        then create an owner with a handful of places.
+        """
+        self.app = create_app("config.TestConfig")
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.owner = facade.create_user({
+            "first_name": "Owner",
+            "last_name": "User",
+            "email": "owner@example.com",
+            "password": "ownerpass"
+        })
+        self.places = []
+        for i in range(5):
+            place = facade.create_place({
+                "title": f"Place {i}",
+                "description": "desc",
+                "price": 10 * (i + 1),
+                "latitude": 45.0,
+                "longitude": 10.0,
+                "owner_id": self.owner.id
+            })
+            place.created_at = datetime(2024, 1, 1) + timedelta(minutes=i)
+            self.places.append(place)
+        db.session.commit()
+        self.place_ids = [place.id for place in self.places]
+
+        self.client = self.app.test_client()
+        self.base_url = "/api/v1/places/"
+
+    def tearDown(self):
+        """
+        Remove the session and drop all tables after each test.
+        """
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_get_places_follows_next_links(self):
+        """
+        Test that walking the Link headers returns every place exactly once, oldest first.
+        """
+        url = f"{self.base_url}?limit=2"
+        seen = []
+        pages = 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.get_json()), 2)
+            seen.extend(p["Place id"] for p in response.get_json())
+            pages += 1
+            link = response.headers.get("Link")
+            url = link[1:link.index(">")] if link else None
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, [p.id for p in self.places])
+
+    def test_get_places_same_created_at(self):
+        """
+        Test that places sharing a created_at timestamp are ordered by id and never skipped.
+        """
+        stamp = datetime(2024, 1, 1)
+        for place in self.places:
+            place.created_at = stamp
+        db.session.commit()
+
+        first, cursor = facade.get_places_page(3)
+        second, last_cursor = facade.get_places_page(3, cursor)
+        self.assertIsNone(last_cursor)
+        self.assertEqual([p.id for p in first + second], sorted(p.id for p in self.places))
+
+    def test_get_places_invalid_cursor(self):
+        """
+        Test that a malformed cursor or an out-of-range limit is rejected with 400.
+        """
+        self.assertEqual(self.client.get(f"{self.base_url}?cursor=not-a-cursor").status_code, 400)
+        self.assertEqual(self.client.get(f"{self.base_url}?limit=0").status_code, 400)
+        self.assertEqual(self.client.get(f"{self.base_url}?limit=1000").status_code, 400)
+
+    def test_get_places_last_page_has_no_link(self):
+        """
+        Test that the final page carries no Link header.
+        """
+        response = self.client.get(f"{self.base_url}?limit=5")
+        self.assertEqual(len(response.get_json()), 5)
+        self.assertNotIn("Link", response.headers)
+
+
+    def _add_reviews(self, count):
+        """Give every place `count` reviews, each written by a different user"""
+        amenity = facade.create_amenity({"name": f"Amenity {count}"})
+        for i in range(count):
+            reviewer = facade.create_user({
+                "first_name": "Reviewer",
+                "last_name": str(i),
+                "email": f"reviewer{count}-{i}@example.com",
+                "password": "reviewpass"
+            })
+            for place_id in self.place_ids:
+                facade.create_review({
+                    "text": "Nice",
+                    "rating": 4,
+                    "user_id": reviewer.id,
+                    "place_id": place_id
+                })
+        for place_id in self.place_ids:
+            facade.get_place(place_id).add_amenity(amenity)
+        db.session.commit()
+        db.session.expunge_all()
+
+    def test_list_query_count_is_bounded(self):
+        """
+        Test that listing places costs the same number of queries however many reviews they have.
+        """
+        self._add_reviews(1)
+        with count_queries() as few:
+            self.assertEqual(self.client.get(self.base_url).status_code, 200)
+
+        self._add_reviews(4)
+        with count_queries() as many:
+            response = self.client.get(self.base_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()[0]["reviews"]), 5)
+        self.assertEqual(len(many), len(few))
+        self.assertLessEqual(len(many), 4)
+
+    def test_detail_query_count_is_bounded(self):
+        """
+        Test that a place detail costs the same number of queries however many reviews it has.
+        """
+        place_id = self.place_ids[0]
+        self._add_reviews(1)
+        with count_queries() as few:
+            self.assertEqual(self.client.get(f"{self.base_url}{place_id}").status_code, 200)
+
+        self._add_reviews(4)
+        with count_queries() as many:
+            response = self.client.get(f"{self.base_url}{place_id}")
+        self.assertEqual(len(response.get_json()["reviews"]), 5)
+        self.assertEqual(len(many), len(few))
+        self.assertLessEqual(len(many), 4)
+
+
+    def test_stream_places(self):
+        """
+        Test that ?stream=true returns every place as one chunked JSON array.
+        """
+        self.app.config["STREAM_BATCH_SIZE"] = 2
+        response = self.client.get(f"{self.base_url}?stream=true", buffered=False)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        chunks = [c.decode() if isinstance(c, bytes) else c for c in response.response]
+        self.assertEqual(chunks[0], "[")
+        self.assertEqual([p["Place id"] for p in json.loads("".join(chunks))], self.place_ids)
+
+
+    def _titles(self, query):
+        response = self.client.get(f"{self.base_url}?{query}")
+        self.assertEqual(response.status_code, 200)
+        return [p["title"] for p in response.get_json()]
+
+    def test_filter_by_price(self):
+        """
+        Test that min_price and max_price bound the nightly price, inclusively.
+        """
+        self.assertEqual(self._titles("min_price=20&max_price=40"), ["Place 1", "Place 2", "Place 3"])
+        self.assertEqual(self._titles("max_price=10"), ["Place 0"])
+        self.assertEqual(self.client.get(f"{self.base_url}?min_price=cheap").status_code, 400)
+
+    def test_filter_by_rating_and_amenity(self):
+        """
+        Test that min_rating uses the average review rating and amenity requires every listed amenity.
+        """
+        wifi = facade.create_amenity({"name": "Wifi"})
+        pool = facade.create_amenity({"name": "Pool"})
+        facade.get_place(self.place_ids[0]).add_amenity(wifi)
+        facade.get_place(self.place_ids[1]).add_amenity(wifi)
+        facade.get_place(self.place_ids[1]).add_amenity(pool)
+        db.session.commit()
+        for place_id, rating in ((self.place_ids[0], 5), (self.place_ids[0], 3), (self.place_ids[2], 2)):
+            facade.create_review({"text": "ok", "rating": rating, "user_id": self.owner.id, "place_id": place_id})
+
+        self.assertEqual(self._titles("min_rating=4"), ["Place 0"])
+        self.assertEqual(self._titles(f"amenity={wifi.id}"), ["Place 0", "Place 1"])
+        self.assertEqual(self._titles(f"amenity={wifi.id}&amenity={pool.id}"), ["Place 1"])
+
+    def test_filters_are_kept_in_next_link(self):
+        """
+        Test that the Link header of a filtered page keeps the filters.
+        """
+        response = self.client.get(f"{self.base_url}?min_price=20&limit=2")
+        link = response.headers["Link"]
+        next_page = self.client.get(link[1:link.index(">")])
+        self.assertEqual([p["title"] for p in next_page.get_json()], ["Place 3", "Place 4"])
+
+
+    def _search(self, bbox):
+        response = self.client.get(f"{self.base_url}search?bbox={bbox}")
+        self.assertEqual(response.status_code, 200)
+        return sorted(p["title"] for p in response.get_json())
+
+    def test_search_bbox(self):
+        """
+        Test the bounding-box search, including moved places and boxes crossing the antimeridian.
+        """
+        coordinates = [(48.85, 2.35), (51.5, -0.12), (40.7, -74.0), (-36.8, 174.7), (-17.7, -178.0)]
+        for place_id, (lat, lng) in zip(self.place_ids, coordinates):
+            facade.update_place(place_id, {"latitude": lat, "longitude": lng})
+
+        self.assertEqual(self._search("-5,45,5,55"), ["Place 0", "Place 1"])
+        self.assertEqual(self._search("170,-40,-170,0"), ["Place 3", "Place 4"])
+        self.assertEqual(self._search("2.35,48.85,2.35,48.85"), ["Place 0"])
+
+        facade.update_place(self.place_ids[2], {"latitude": 50.0, "longitude": 0.0})
+        self.assertEqual(self._search("-5,45,5,55"), ["Place 0", "Place 1", "Place 2"])
+
+    def test_search_bbox_without_rtree(self):
+        """
+        Test that the column fallback used on other engines finds the same places.
+        """
+        facade.update_place(self.place_ids[0], {"latitude": 10.0, "longitude": 20.0})
+        repository = facade.place_repository
+        repository.uses_rtree = lambda: False
+        try:
+            self.assertEqual(self._search("19,9,21,11"), ["Place 0"])
+        finally:
+            del repository.uses_rtree
+
+    def test_search_bbox_invalid(self):
+        """
+        Test that a missing or malformed bbox is rejected with 400.
+        """
+        for query in ("", "?bbox=1,2,3", "?bbox=a,b,c,d", "?bbox=0,10,1,5", "?bbox=0,-95,1,5"):
+            self.assertEqual(self.client.get(f"{self.base_url}search{query}").status_code, 400)
+
+
+    def test_place_reviews_paged_and_sorted(self):
+        """
+        Test that a place's reviews are paged with a Link header and sorted as requested.
+        """
+        place_id = self.place_ids[0]
+        for rating in (3, 5, 1, 4):
+            facade.create_review({"text": f"Rated {rating}", "rating": rating,
+                                  "user_id": self.owner.id, "place_id": place_id})
+        facade.create_review({"text": "Elsewhere", "rating": 2,
+                              "user_id": self.owner.id, "place_id": self.place_ids[1]})
+
+        response = self.client.get(f"{self.base_url}{place_id}/reviews?sort=-rating&limit=3")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r["rating"] for r in response.get_json()], [5, 4, 3])
+        link = response.headers["Link"]
+        rest = self.client.get(link[1:link.index(">")])
+        self.assertEqual([r["rating"] for r in rest.get_json()], [1])
+        self.assertNotIn("Link", rest.headers)
+
+        db.session.expunge_all()
+        with count_queries() as statements:
+            response = self.client.get(f"{self.base_url}{place_id}/reviews")
+        self.assertEqual([r["text"] for r in response.get_json()], ["Rated 3", "Rated 5", "Rated 1", "Rated 4"])
+        self.assertFalse([statement for statement in statements if "place_amenity" in statement])
+
+    def test_place_reviews_errors(self):
+        """
+        Test that an unknown place answers 404 and an unknown sort answers 400.
+        """
+        self.assertEqual(self.client.get(f"{self.base_url}missing/reviews").status_code, 404)
+        self.assertEqual(self.client.get(f"{self.base_url}{self.place_ids[0]}/reviews?sort=text").status_code, 400)
+        for query in ("limit=0", f"limit={MAX_PAGE_LIMIT + 1}", "offset=-1"):
+            response = self.client.get(f"{self.base_url}{self.place_ids[0]}/reviews?{query}")
+            self.assertEqual(response.status_code, 400, query)
+
+    def test_place_detail_cache(self):
+        """
+        Test that a repeated detail read is served from the cache and that writes invalidate it.
+        """
+        place_id = self.place_ids[0]
+        url = f"{self.base_url}{place_id}"
+        self.client.get(url)
+        with count_queries() as statements:
+            self.assertEqual(self.client.get(url).get_json()["title"], "Place 0")
+        self.assertEqual(len(statements), 1)  # the ETag's updated_at lookup
+        self.assertEqual(facade.place_cache_stats()["hits"], 1)
+
+        facade.update_place(place_id, {"title": "Renamed"})
+        self.assertEqual(self.client.get(url).get_json()["title"], "Renamed")
+
+        review = facade.create_review({"text": "Good", "rating": 4, "user_id": self.owner.id, "place_id": place_id})
+        self.assertEqual(self.client.get(url).get_json()["review_count"], 1)
+        facade.update_review(review.id, {"rating": 2})
+        self.assertEqual(self.client.get(url).get_json()["average_rating"], 2)
+        facade.delete_review(review.id)
+        self.assertEqual(self.client.get(url).get_json()["reviews"], [])
+
+        amenity = facade.create_amenity({"name": "Wifi"})
+        facade.update_place(place_id, {"amenities": [amenity.id]})
+        self.client.get(url)
+        facade.update_amenity(amenity.id, {"name": "Fast wifi"})
+        self.assertEqual(self.client.get(url).get_json()["amenities"][0]["name"], "Fast wifi")
+        self.assertEqual(self.client.get(f"{self.base_url}missing").status_code, 404)
+
+    def test_place_detail_cache_ignores_other_versions(self):
+        """
+        Test that a snapshot cached for an older updated_at is not served, e.g. after a write by another worker.
+        """
+        place_id = self.place_ids[0]
+        url = f"{self.base_url}{place_id}"
+        etag = self.client.get(url).headers["ETag"]
+        # Written behind the facade's back, so this process never invalidates the entry
+        db.session.execute(text("UPDATE places SET title = 'Elsewhere', updated_at = :now WHERE title = 'Place 0'"),
+                           {"now": datetime.now() + timedelta(seconds=1)})
+        db.session.commit()
+        response = self.client.get(url)
+        self.assertEqual(response.get_json()["title"], "Elsewhere")
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertEqual(self.client.get(url).get_json()["title"], "Elsewhere")
+        self.assertEqual(facade.place_cache_stats()["hits"], 1)
+
+    def test_place_detail_cache_disabled(self):
+        """
+        Test that turning the cache off reads every detail from the database.
+        """
+        facade.configure_place_cache(False, 0)
+        url = f"{self.base_url}{self.place_ids[0]}"
+        self.client.get(url)
+        db.session.expunge_all()
+        with count_queries() as statements:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertNotEqual(statements, [])
+        self.assertEqual(facade.place_cache_stats(), {"enabled": False})
+
+
+    def _revalidate(self, url, etag):
+        return self.client.get(url, headers={"If-None-Match": etag})
+
+    def test_place_etag(self):
+        """
+        Test that a place detail answers 304 to its own ETag with one query, and changes when the place does.
+        """
+        place_id = self.place_ids[0]
+        url = f"{self.base_url}{place_id}"
+        etag = self.client.get(url).headers["ETag"]
+        db.session.expunge_all()
+        with count_queries() as statements:
+            response = self._revalidate(url, etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"")
+        self.assertEqual(len(statements), 1)
+
+        review = facade.create_review({"text": "Good", "rating": 4, "user_id": self.owner.id, "place_id": place_id})
+        response = self._revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["ETag"]
+        facade.update_review(review.id, {"text": "Very good"})
+        response = self._revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["ETag"]
+
+        amenity = facade.create_amenity({"name": "Wifi"})
+        facade.update_place(place_id, {"amenities": [amenity.id]})
+        etag = self.client.get(url).headers["ETag"]
+        facade.update_amenity(amenity.id, {"name": "Fast wifi"})
+        self.assertEqual(self._revalidate(url, etag).status_code, 200)
+        self.assertEqual(self._revalidate(f"{self.base_url}missing", etag).status_code, 404)
+
+    def test_collection_etags(self):
+        """
+        Test that list ETags follow max(updated_at) and count, and that every resource route sets one.
+        """
+        url = f"{self.base_url}?min_price=20"
+        etag = self.client.get(url).headers["ETag"]
+        self.assertEqual(self._revalidate(url, etag).status_code, 304)
+        self.assertEqual(self._revalidate(url, '"other", ' + etag).status_code, 304)
+        self.assertEqual(self._revalidate(url, "*").status_code, 304)
+        facade.update_place(self.place_ids[4], {"price": 55})
+        self.assertEqual(self._revalidate(url, etag).status_code, 200)
+
+        amenity = facade.create_amenity({"name": "Pool"})
+        review = facade.create_review({"text": "Fine", "rating": 3, "user_id": self.owner.id,
+                                       "place_id": self.place_ids[0]})
+        for url in ("/api/v1/amenities/", f"/api/v1/amenities/{amenity.id}",
+                    "/api/v1/reviews/", f"/api/v1/reviews/{review.id}",
+                    f"{self.base_url}{self.place_ids[0]}/reviews"):
+            etag = self.client.get(url).headers["ETag"]
+            self.assertEqual(self._revalidate(url, etag).status_code, 304, url)
+
+        list_etag = self.client.get("/api/v1/amenities/").headers["ETag"]
+        facade.create_amenity({"name": "Sauna"})
+        self.assertEqual(self._revalidate("/api/v1/amenities/", list_etag).status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import unittest
+from app import create_app, db
+from app.persistence.repository import unit_of_work
+from app.services import facade
+from tests.test_engine import file_config
+
+
+class TestReadReplicaRouting(unittest.TestCase):
+    """
+    This test case verifies read-replica routing, using a second SQLite
+    file as the replica and copying the primary over it to "replicate".
+    """
+
+    def setUp(self):
+        """
+        Set up a primary and a replica database file with the same schema and an owner on the primary.
+        """
+        self.tmpdir = tempfile.mkdtemp()
+        self.primary = os.path.join(self.tmpdir, 'primary.db')
+        self.replica = os.path.join(self.tmpdir, 'replica.db')
+        # Rollback journal, so the whole database is in the file copied by replicate()
+        self.app = create_app(file_config(self.primary, SQLITE_TUNING=False,
+                                          SQLALCHEMY_BINDS={'replica_0': f'sqlite:///{self.replica}'},
+                                          READ_REPLICAS=['replica_0']))
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.metadata.create_all(db.engines['replica_0'])
+
+        self.owner = facade.create_user({"first_name": "Replica", "last_name": "Owner",
+                                         "email": "replica@example.com", "password": "pw"})
+        self.place_data = {"title": "Cabin", "price": 80, "latitude": 45.0, "longitude": 6.0,
+                           "owner_id": self.owner.id}
+        self.place = facade.create_place(self.place_data)
+        self._new_request()
+
+    def tearDown(self):
+        """
+        Remove the session, dispose of both engines and delete the files.
+        """
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+        self.app_context.pop()
+        # db is shared by every app: forget the bind so other tests' create_all/drop_all skip it
+        db.metadatas.pop('replica_0', None)
+        shutil.rmtree(self.tmpdir)
+
+    def _new_request(self):
+        """Start over with a fresh session, as the next request would"""
+        db.session.remove()
+
+    def replicate(self):
+        """Bring the replica up to date with the primary"""
+        self._new_request()
+        for engine in db.engines.values():
+            engine.dispose()
+        shutil.copyfile(self.primary, self.replica)
+
+    def test_reads_go_to_replica(self):
+        """
+        Test that read-only facade calls see the replica, lag included, until it catches up.
+        """
+        self.assertEqual(facade.get_all_places(), [])
+        with self.assertRaises(ValueError):
+            facade.get_place(self.place.id)
+        self.assertEqual(facade.get_places_version()[1], 0)
+
+        self.replicate()
+        self.assertEqual([p.id for p in facade.get_all_places()], [self.place.id])
+        self.assertEqual(facade.get_place(self.place.id).title, "Cabin")
+
+    def test_read_your_writes(self):
+        """
+        Test that once a session has written, its reads go to the primary.
+        """
+        self.replicate()
+        facade.create_place(dict(self.place_data, title="Chalet"))
+        self.assertEqual(len(facade.get_all_places()), 2)
+        self._new_request()
+        self.assertEqual(len(facade.get_all_places()), 1)
+
+    def test_primary_for_unsafe_methods_and_units_of_work(self):
+        """
+        Test that reads made by a POST request or inside a unit of work use the primary.
+        """
+        with self.app.test_request_context(method="POST"):
+            self.assertEqual(len(facade.get_all_places()), 1)
+        self._new_request()
+        with self.app.test_request_context(method="GET"):
+            self.assertEqual(len(facade.get_all_places()), 0)
+        self._new_request()
+        with unit_of_work():
+            self.assertEqual(len(facade.get_all_places()), 1)
+
+    def test_no_replicas_configured(self):
+        """
+        Test that without READ_REPLICAS every read goes to the primary.
+        """
+        self.app.config["READ_REPLICAS"] = []
+        self.assertEqual(len(facade.get_all_places()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
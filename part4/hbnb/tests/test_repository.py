@@ -0,0 +1,83 @@
+import unittest
+from app import create_app, db
+from app.models.amenity import Amenity
+from app.persistence.repository import InMemoryRepository, SQLAlchemyRepository
+from tests.test_places_api import count_queries
+
+
+class TestBulkRepository(unittest.TestCase):
+    """
+    This test case verifies the bulk repository operations and that the
+    in-memory and SQLAlchemy backends behave the same way.
+    """
+
+    def setUp(self):
+        """
+        Set up a test application context and an in-memory database.
+        """
+        self.app = create_app("config.TestConfig")
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        """
+        Remove the session and drop all tables after each test.
+        """
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _exercise(self, repository):
+        """Run the same bulk calls against a backend and describe the outcome by amenity name"""
+        amenities = [Amenity(name=name) for name in ("Wifi", "Pool", "Sauna")]
+        ids = [amenity.id for amenity in amenities]
+        repository.add_many(amenities)
+
+        found, missing = repository.get_many([ids[2], "missing", ids[0], ids[0]])
+        got = ([a.name for a in found], missing)
+
+        updated, missing = repository.update_many({ids[0]: {"name": "Fast wifi"}, "missing": {"name": "Nope"}})
+        changed = ([a.name for a in updated], missing)
+
+        deleted = repository.delete_many([ids[1], "missing", ids[1]])
+        remaining = sorted(a.name for a in repository.get_all())
+        return got, changed, deleted, remaining, repository.get_many([]), repository.delete_many([])
+
+    def test_backends_agree(self):
+        """
+        Test that add_many, get_many, update_many and delete_many give the same results on both backends.
+        """
+        in_memory = self._exercise(InMemoryRepository())
+        sql = self._exercise(SQLAlchemyRepository(Amenity))
+        self.assertEqual(in_memory, sql)
+        self.assertEqual(sql, (
+            (["Sauna", "Wifi", "Wifi"], ["missing"]),
+            (["Fast wifi"], ["missing"]),
+            1,
+            ["Fast wifi", "Sauna"],
+            ([], []),
+            0,
+        ))
+
+    def test_update_many_is_set_based(self):
+        """
+        Test that updating several rows costs one IN query and one executemany UPDATE.
+        """
+        repository = SQLAlchemyRepository(Amenity)
+        amenities = [Amenity(name=f"Amenity {i}") for i in range(5)]
+        repository.add_many(amenities)
+        updates = {a.id: {"name": a.name.upper()} for a in amenities}
+        db.session.expunge_all()
+
+        with count_queries() as statements:
+            updated, _ = repository.update_many(updates)
+        self.assertEqual(len(updated), 5)
+        self.assertEqual([s.split()[0] for s in statements], ["SELECT", "UPDATE"])
+
+        db.session.expire_all()
+        self.assertEqual(Amenity.query.filter(Amenity.name.like("AMENITY%")).count(), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import json
+import unittest
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models.user import User
+from tests.test_places_api import count_queries
+
+
+class UsersListAPITestCase(unittest.TestCase):
+    """
+    This test case verifies the user listing: keyset pagination and
+    column projection that never loads password hashes or relationships.
+    """
+
+    def setUp(self):
+        """
+        Set up a test application context and an in-memory database with five users.
+        """
+        self.app = create_app("config.TestConfig")
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        for i in range(5):
+            user = User(first_name="User", last_name=str(i), email=f"user{i}@example.com", password="pw")
+            user.created_at = datetime(2024, 1, 1) + timedelta(minutes=i)
+            db.session.add(user)
+        db.session.commit()
+        self.emails = [f"user{i}@example.com" for i in range(5)]
+
+        self.client = self.app.test_client()
+        self.base_url = "/api/v1/users/"
+
+    def tearDown(self):
+        """
+        Remove the session and drop all tables after each test.
+        """
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_get_users_follows_next_links(self):
+        """
+        Test that walking the Link headers returns every user once, oldest first, with four fields each.
+        """
+        url = f"{self.base_url}?limit=2"
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            for user in response.get_json():
+                self.assertEqual(set(user), {"id", "first_name", "last_name", "email"})
+                seen.append(user["email"])
+            link = response.headers.get("Link")
+            url = link[1:link.index(">")] if link else None
+        self.assertEqual(seen, self.emails)
+        self.assertEqual(self.client.get(f"{self.base_url}?limit=0").status_code, 400)
+
+    def test_listing_is_projected(self):
+        """
+        Test that the listing query selects only the serialized columns, never the password hash.
+        """
+        db.session.expunge_all()
+        with count_queries() as statements:
+            self.client.get(self.base_url)
+            self.client.get(f"{self.base_url}?stream=true").get_data()
+        self.assertEqual(len(statements), 2)
+        for statement in statements:
+            self.assertNotIn("password", statement)
+        self.assertEqual(len(db.session.identity_map), 0)
+
+    def test_stream_users(self):
+        """
+        Test that ?stream=true returns every user in one chunked JSON array.
+        """
+        self.app.config["STREAM_BATCH_SIZE"] = 2
+        response = self.client.get(f"{self.base_url}?stream=true", buffered=False)
+        self.assertTrue(response.is_streamed)
+        body = "".join(c.decode() if isinstance(c, bytes) else c for c in response.response)
+        self.assertEqual([u["email"] for u in json.loads(body)], self.emails)
+
+
+class UserResourceAPITestCase(unittest.TestCase):
+    """
+    This test case verifies GET and PUT on /api/v1/users/<user_id>.
+    """
+
+    def setUp(self):
+        """
+        Set up a test application with an admin and a regular user.
+        """
+        self.app = create_app("config.TestConfig")
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        admin = User(first_name="Admin", last_name="User", email="admin@example.com", password="pw", is_admin=True)
+        user = User(first_name="Regular", last_name="User", email="user@example.com", password="pw")
+        db.session.add_all([admin, user])
+        db.session.commit()
+        self.user_id = user.id
+        self.admin_token = create_access_token(identity={"id": admin.id, "is_admin": True})
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        """
+        Remove the session and drop all tables after each test.
+        """
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_get_user(self):
+        """
+        Test that a user is returned by id and that an unknown id is a 404.
+        """
+        response = self.client.get(f"/api/v1/users/{self.user_id}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["email"], "user@example.com")
+        self.assertEqual(self.client.get("/api/v1/users/missing").status_code, 404)
+
+    def test_admin_updates_another_user(self):
+        """
+        Test that an admin can change another user's name and email.
+        """
+        response = self.client.put(f"/api/v1/users/{self.user_id}",
+                                   json={"first_name": "Renamed", "last_name": "User",
+                                         "email": "renamed@example.com", "password": "pw2"},
+                                   headers={"Authorization": f"Bearer {self.admin_token}"})
+        self.assertEqual(response.status_code, 200, response.get_json())
+        self.assertEqual(response.get_json()["email"], "renamed@example.com")
+
+
+if __name__ == "__main__":
+    unittest.main()